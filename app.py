@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, Response, jsonify, session
+from flask import Flask, render_template, request, Response, jsonify, session, send_file, abort
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
@@ -7,12 +7,24 @@ import os
 import json
 import logging
 import time
+import hmac
+import mimetypes
 import hashlib
+import threading
 from datetime import datetime, timedelta
-import redis
 
 from src.helper import download_hugging_face_embeddings
 from src.security import SecurityManager, audit_log
+from src.medical_rag import AdvancedMedicalRAG, stage_executor
+from src.llm_handler import llm_configured
+from src.prefetch import PrefetchCache
+from src.index_generations import current_generation
+import src.rate_limit  # noqa: F401  registers the leased+redis:// rate-limit storage
+from src.timing import StageTimer
+from src.profiling import SamplingProfiler, should_profile, profile_stream
+from src.traffic_capture import TrafficRecorder
+from src.redis_store import ResilientStore, CircuitBreaker
+from src.assets import AssetManifest, MANIFEST_FILE, IMMUTABLE, precompressed_variant
 from config import Config
 
 # --- Simple Initialization ---
@@ -57,7 +69,11 @@ limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
+    storage_uri=Config.RATELIMIT_STORAGE_URL,
+    storage_options={"allowance_ttl": Config.RATELIMIT_ALLOWANCE_TTL, "max_lease": Config.RATELIMIT_MAX_LEASE}
+    if Config.RATELIMIT_STORAGE_URL.startswith("leased+") else {},
+    strategy=Config.RATELIMIT_STRATEGY,
+    in_memory_fallback_enabled=True,
 )
 
 security_manager = SecurityManager()
@@ -66,13 +82,18 @@ security_manager = SecurityManager()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Redis (optional)
-try:
-    redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-    redis_client.ping()
+# Redis (optional): sessions survive worker restarts; in-process storage while it is unreachable
+session_store = ResilientStore(
+    Config.REDIS_URL,
+    breaker=CircuitBreaker(Config.REDIS_BREAKER_FAILURES, Config.REDIS_BREAKER_RESET_SECONDS),
+    near_cache_ttl=Config.REDIS_NEAR_CACHE_TTL,
+    max_connections=Config.REDIS_MAX_CONNECTIONS,
+    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+    connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+)
+if session_store.ping():
     logger.info("Redis connected")
-except:
-    redis_client = None
+else:
     logger.info("Redis not available, using in-memory session storage")
 
 load_dotenv()
@@ -86,27 +107,101 @@ except Exception as e:
     print(f"❌ Embeddings failed: {e}")
     embeddings = None
 
+# Retrieval-backed answers when a knowledge base and a real LLM are available; built-in responses otherwise
+rag_system = None
+if embeddings is not None and not llm_configured():
+    print("⚠️ No LLM API key configured, using built-in responses")
+elif embeddings is not None:
+    try:
+        rag_system = AdvancedMedicalRAG(
+            embeddings,
+            index_name="medical-chatbot",
+            docstore_dir=Config.LOCAL_INDEX_DIR,
+            vector_backend=Config.VECTOR_INDEX_BACKEND,
+            rescore_factor=Config.RESCORE_FACTOR,
+            search_shards=Config.SEARCH_SHARDS,
+            shard_min_vectors=Config.SHARD_MIN_VECTORS,
+            query_expansion=Config.QUERY_EXPANSION,
+            credibility_weight=Config.CREDIBILITY_WEIGHT,
+        )
+        print("✅ Medical RAG ready")
+    except Exception as e:
+        print(f"⚠️ Medical RAG unavailable, using built-in responses: {e}")
+
+
+
+def watch_index_generations(interval: int):
+    """Poll for a newly published index generation; every worker runs its own watcher"""
+    while True:
+        time.sleep(interval)
+        try:
+            if current_generation(Config.LOCAL_INDEX_DIR)[0] != rag_system.generation:
+                rag_system.reload_index()
+        except Exception as e:
+            logger.error(f"Index reload failed: {e}")
+
+
+if rag_system is not None and Config.INDEX_RELOAD_INTERVAL > 0:
+    threading.Thread(target=watch_index_generations, args=(Config.INDEX_RELOAD_INTERVAL,),
+                     name="index-watcher", daemon=True).start()
+
+# Drafts are shared through Redis: /prefetch and the following /get usually reach different
+# workers. No near-cache, so a draft warmed by one worker is visible to the next at once.
+prefetch_cache = PrefetchCache(
+    ResilientStore(Config.REDIS_URL, breaker=session_store.breaker, near_cache_ttl=0,
+                   max_connections=Config.REDIS_MAX_CONNECTIONS, socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                   connect_timeout=Config.REDIS_SOCKET_TIMEOUT),
+    ttl_seconds=Config.PREFETCH_TTL_SECONDS,
+    similarity=Config.PREFETCH_SIMILARITY,
+)
+
 # Session Management
-conversation_store = {}
+
+traffic_recorder = None
+if Config.TRAFFIC_CAPTURE_DIR:
+    traffic_recorder = TrafficRecorder(Config.TRAFFIC_CAPTURE_DIR, Config.TRAFFIC_CAPTURE_SAMPLE_RATE)
+
+# Hashed asset URLs from build_assets.py; plain /static URLs in development
+asset_manifest = AssetManifest(Config.ASSET_BUILD_DIR)
+
+
+@app.context_processor
+def inject_assets():
+    return {"asset_url": asset_manifest.url, "asset_version": asset_manifest.version or "dev"}
+
+
+# Profiling settings, adjustable at runtime through /admin/profiling. Changes are kept in
+# Redis, so every worker picks them up within REDIS_NEAR_CACHE_TTL seconds; while Redis is
+# unavailable a change only reaches the worker that served the request.
+PROFILING_SETTINGS_KEY = "admin:profiling"
+profiling_defaults = {"sample_rate": Config.PROFILE_SAMPLE_RATE, "format": Config.PROFILE_FORMAT}
+
+
+_parsed_profiling_settings = (None, profiling_defaults)  # (stored JSON, settings parsed from it)
+
+
+def get_profiling_settings() -> dict:
+    """
+    Current settings; treat as read-only. Costs a near-cache lookup per
+    request and a Redis GET at most once per REDIS_NEAR_CACHE_TTL; the
+    JSON is only parsed again when the stored value changes.
+    """
+    global _parsed_profiling_settings
+    stored = session_store.get(PROFILING_SETTINGS_KEY)
+    raw, settings = _parsed_profiling_settings
+    if stored != raw:
+        settings = {**profiling_defaults, **json.loads(stored)} if stored else profiling_defaults
+        _parsed_profiling_settings = (stored, settings)
+    return settings
 
 
 def get_session_history(session_id: str):
-    if redis_client:
-        try:
-            history = redis_client.get(f"session:{session_id}")
-            return json.loads(history) if history else []
-        except:
-            pass
-    return conversation_store.get(session_id, [])
+    history = session_store.get(f"session:{session_id}")
+    return json.loads(history) if history else []
 
 
 def save_session_history(session_id: str, messages: list):
-    conversation_store[session_id] = messages
-    if redis_client:
-        try:
-            redis_client.setex(f"session:{session_id}", 3600, json.dumps(messages))
-        except:
-            pass
+    session_store.set(f"session:{session_id}", json.dumps(messages), 3600)
 
 
 # Routes
@@ -119,15 +214,186 @@ def index():
     return render_template('chat.html')
 
 
+@app.route("/assets/<path:filename>")
+def assets(filename):
+    """Serve a fingerprinted asset, precompressed when the client accepts it"""
+    path = os.path.abspath(os.path.join(Config.ASSET_BUILD_DIR, filename))
+    if not path.startswith(os.path.abspath(Config.ASSET_BUILD_DIR) + os.sep) or not os.path.isfile(path):
+        abort(404)
+
+    if filename == MANIFEST_FILE:
+        # Read by the service worker on every update check; never cached long
+        response = send_file(path, mimetype="application/json", max_age=0)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    variant = precompressed_variant(path, request.headers.get("Accept-Encoding", ""))
+    if variant is not None:
+        encoding, path = variant
+        response = send_file(path, mimetype=mimetype, conditional=True)
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True)
+    response.headers["Cache-Control"] = IMMUTABLE
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+@app.route("/sw.js")
+def service_worker():
+    """Served from the root so the worker controls the whole site; always revalidated"""
+    response = send_file(os.path.join(Config.STATIC_DIR, "sw.js"), mimetype="application/javascript", max_age=0)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @app.route("/health")
 def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "2.0.0"
+        "version": "2.0.0",
+        "prefetch": prefetch_cache.stats(),
+        "redis": session_store.stats(),
+        "index_generation": rag_system.generation if rag_system is not None else None
     })
 
 
+def admin_authorized() -> bool:
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(Config.ADMIN_TOKEN) and hmac.compare_digest(token, Config.ADMIN_TOKEN)
+
+
+@limiter.request_filter
+def admin_exempt() -> bool:
+    """Admin-authenticated requests (e.g. traffic replay) bypass rate limits"""
+    return admin_authorized()
+
+
+@app.route("/admin/reload-index", methods=["POST"])
+@limiter.limit("5 per minute")
+def reload_index():
+    """
+    Switch the worker that receives this request to the latest published
+    index generation without a restart. Other workers switch on their own
+    watcher's next poll (INDEX_RELOAD_INTERVAL); until then store_index.py
+    leaves the generations they serve in place.
+    """
+    if not admin_authorized():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    if rag_system is None:
+        return jsonify({"status": "error", "message": "Retrieval is not configured"}), 409
+    try:
+        reloaded = rag_system.reload_index()
+    except Exception as e:
+        logger.error(f"Index reload failed: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return jsonify({"status": "success", "reloaded": reloaded, "generation": rag_system.generation,
+                    "scope": "worker", "watcher_interval": Config.INDEX_RELOAD_INTERVAL})
+
+
+@app.route("/admin/profiling", methods=["GET", "POST"])
+@limiter.limit("10 per minute")
+def profiling_control():
+    """
+    Read or change the request profiling sample rate and output format for
+    all workers. "scope" in the response is "worker" when Redis is
+    unavailable and the change only applies to the worker that answered.
+    """
+    if not admin_authorized():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    settings = dict(get_profiling_settings())
+    shared = session_store.client is not None and session_store.breaker.state == "closed"
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        try:
+            if "sample_rate" in data:
+                settings["sample_rate"] = min(max(float(data["sample_rate"]), 0.0), 1.0)
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "sample_rate must be a number"}), 400
+        if data.get("format") in ("speedscope", "collapsed"):
+            settings["format"] = data["format"]
+        shared = session_store.set(PROFILING_SETTINGS_KEY, json.dumps(settings), Config.PROFILE_SETTINGS_TTL_SECONDS)
+    return jsonify({"status": "success", **settings, "directory": Config.PROFILE_DIR,
+                    "scope": "all_workers" if shared else "worker"})
+
+
+def maybe_profile(stream, timer: StageTimer, session_id: str):
+    """Profile a sampled fraction of streams, or any stream an admin asks for with X-Profile"""
+    forced = request.headers.get("X-Profile") == "1" and admin_authorized()
+    settings = get_profiling_settings()
+    if not should_profile(settings["sample_rate"], forced):
+        return stream
+    name = f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}-{security_manager.hash_session_id(session_id)[:8]}"
+    return profile_stream(stream, SamplingProfiler(timer, Config.PROFILE_INTERVAL_MS), Config.PROFILE_DIR, name,
+                          settings["format"])
+
+
+@app.route("/prefetch", methods=["POST"])
+@limiter.limit("30 per minute")
+def prefetch():
+    """Warm retrieval for a draft message while the user is still typing"""
+    data = request.get_json(silent=True) or {}
+    msg = str(data.get("msg", "")).strip()
+    session_id = str(data.get("session_id", "default_session"))
+
+    if rag_system is None or len(msg) < Config.PREFETCH_MIN_CHARS or len(msg) > Config.MAX_QUERY_LENGTH:
+        return "", 204
+    # Same sanitization as /get, so the draft matches the message that is finally sent
+    msg = security_manager.sanitize_input(msg)
+    if not msg or prefetch_cache.contains(session_id, msg):
+        return "", 204
+
+    try:
+        with rag_system.use_generation() as generation:
+            docs = rag_system.hybrid_search(msg, Config.VECTOR_SEARCH_K, generation)
+            prefetch_cache.put(session_id, msg, rag_system.snapshot_retrieval(docs, generation))
+    except Exception as e:
+        logger.warning(f"Prefetch failed: {e}")
+    return "", 204
+
+
+def capture_request(arrival: float, raw_msg: str, session_id: str, query_type: str, timer: StageTimer,
+                    prefetched: bool = False):
+    """Append a sampled request to the traffic trace; the query is stored as typed, with only PII redacted"""
+    if traffic_recorder is not None and traffic_recorder.sampled():
+        traffic_recorder.record(arrival, security_manager.redact_pii(raw_msg),
+                                security_manager.hash_session_id(session_id), query_type, timer.summary(),
+                                (time.perf_counter() - timer.started) * 1000, prefetched=prefetched)
+
+
+def rag_stream(msg: str, session_id: str, timer: StageTimer, raw_msg: str):
+    """
+    Stream a retrieval-augmented answer, reusing prefetched retrieval when
+    available. msg is the sanitized query; raw_msg is the text as typed,
+    which the traffic trace keeps so a replay sends /get the same input.
+    """
+    arrival = time.time()
+    # History loads alongside retrieval; it is only needed once the answer is complete
+    history_future = stage_executor.submit(get_session_history, session_id)
+    query_type = rag_system.classify_medical_query(msg)
+    docs = None
+    snapshot = prefetch_cache.get(session_id, msg)
+    if snapshot is not None:
+        with rag_system.use_generation() as generation:
+            docs = rag_system.restore_retrieval(snapshot, generation)
+
+    response_text = ""
+    for event in rag_system.process_medical_query(msg, query_type, history_future, session_id, docs=docs,
+                                                  timer=timer):
+        if event["type"] == "answer_chunk":
+            response_text += event["content"]
+        yield f'data: {json.dumps(event)}\n\n'
+
+    save_session_history(session_id, history_future.result() + [
+        {"role": "user", "content": msg},
+        {"role": "assistant", "content": response_text}
+    ])
+
+    capture_request(arrival, raw_msg, session_id, query_type, timer, prefetched=docs is not None)
+
+
 @app.route("/get", methods=["GET", "POST"])
 @limiter.limit("10 per minute")
 def chat():
@@ -149,7 +415,21 @@ def chat():
                 mimetype='text/event-stream'
             )
 
+        timer = StageTimer()
+        if rag_system is not None:
+            return Response(
+                maybe_profile(rag_stream(security_manager.sanitize_input(msg), session_id, timer, msg), timer,
+                              session_id),
+                mimetype='text/event-stream',
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'Connection': 'keep-alive',
+                    'Access-Control-Allow-Origin': '*'
+                }
+            )
+
         def simple_stream():
+            arrival = time.time()
             try:
                 print(f"[SIMPLE] Processing: '{msg}'")
 
@@ -346,6 +626,7 @@ def chat():
                 yield f'data: {json.dumps({"type": "sources", "content": ["Medical Guidelines", "Clinical Research", "Health Authorities"]})}\n\n'
 
                 print("[SIMPLE] ✅ Enhanced response sent successfully")
+                capture_request(arrival, msg, session_id, "canned", timer)
 
             except Exception as e:
                 print(f"[SIMPLE] ❌ Error: {e}")
@@ -353,7 +634,7 @@ def chat():
                 yield f'data: {json.dumps({"type": "error", "content": error_msg})}\n\n'
 
         return Response(
-            simple_stream(),
+            maybe_profile(simple_stream(), timer, session_id),
             mimetype='text/event-stream',
             headers={
                 'Cache-Control': 'no-cache',
@@ -370,6 +651,39 @@ def chat():
         )
 
 
+@app.route("/batch", methods=["POST"])
+@limiter.limit("5 per minute")
+def batch():
+    """Answer a list of questions, streaming one NDJSON line per question as each completes"""
+    if rag_system is None:
+        return jsonify({"status": "error", "message": "Retrieval is not configured"}), 503
+
+    data = request.get_json(silent=True) or {}
+    questions = data.get("questions")
+    if not isinstance(questions, list) or not 0 < len(questions) <= Config.BATCH_MAX_QUESTIONS:
+        return jsonify({"status": "error",
+                        "message": f"questions must be a list of 1-{Config.BATCH_MAX_QUESTIONS} strings"}), 400
+    questions = [str(question).strip() for question in questions]
+    if any(not question or len(question) > Config.MAX_QUERY_LENGTH for question in questions):
+        return jsonify({"status": "error",
+                        "message": f"Each question must be 1-{Config.MAX_QUERY_LENGTH} characters"}), 400
+    # Same treatment as /get: PII is redacted and markup escaped before anything reaches the LLM or the response
+    questions = [security_manager.sanitize_input(question) for question in questions]
+
+    session_id = session.get('session_id', 'batch')
+    audit_log("batch_questions", session_id, {"count": len(questions), "ip": request.remote_addr})
+
+    def ndjson_stream():
+        try:
+            for result in rag_system.answer_batch(questions, k=Config.VECTOR_SEARCH_K):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.error(f"Batch processing error: {e}")
+            yield json.dumps({"type": "error", "content": "Batch processing failed"}) + "\n"
+
+    return Response(ndjson_stream(), mimetype='application/x-ndjson', headers={'Cache-Control': 'no-cache'})
+
+
 @app.route("/feedback", methods=["POST"])
 @limiter.limit("5 per minute")
 def feedback():
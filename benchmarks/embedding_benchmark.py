@@ -0,0 +1,64 @@
+# benchmarks/embedding_benchmark.py - Throughput and vector agreement of embedding backends
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.embedding_backend import OnnxMiniLMEmbeddings, configure_torch_threads, MODEL_NAME
+from config import Config
+
+SENTENCES = [
+    "Hypertension is a chronic elevation of arterial blood pressure.",
+    "Myocardial infarction occurs when blood flow to part of the heart is blocked.",
+    "Type 2 diabetes is characterized by insulin resistance and relative insulin deficiency.",
+    "Asthma causes reversible airway obstruction, wheezing and shortness of breath.",
+    "Influenza typically presents with fever, myalgia, headache and a dry cough.",
+    "Chronic kidney disease is staged by estimated glomerular filtration rate.",
+    "Migraine headaches are often unilateral, throbbing and accompanied by nausea.",
+    "Osteoporosis reduces bone density and increases the risk of fractures.",
+]
+
+
+def measure(embeddings, texts):
+    embeddings.embed_documents(texts[:8])  # warm-up
+    start = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    return vectors, len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=2, help="Threads per worker for the tuned backends")
+    args = parser.parse_args()
+
+    texts = [f"{SENTENCES[i % len(SENTENCES)]} (case {i})" for i in range(args.texts)]
+
+    baseline_vectors, baseline_rate = measure(HuggingFaceEmbeddings(model_name=MODEL_NAME), texts)
+    baseline_vectors /= np.linalg.norm(baseline_vectors, axis=1, keepdims=True)
+
+    configure_torch_threads(args.threads)
+    backends = {
+        f"torch ({args.threads} thr)": lambda: HuggingFaceEmbeddings(
+            model_name=MODEL_NAME, encode_kwargs={"batch_size": Config.EMBEDDING_BATCH_SIZE}),
+        f"onnx fp32 ({args.threads} thr)": lambda: OnnxMiniLMEmbeddings(
+            Config.ONNX_MODEL_DIR, int8=False, threads=args.threads),
+        f"onnx int8 ({args.threads} thr)": lambda: OnnxMiniLMEmbeddings(
+            Config.ONNX_MODEL_DIR, int8=True, threads=args.threads),
+    }
+
+    print(f"{'backend':<22} {'texts/s':>9} {'speedup':>8} {'mean cos':>9} {'min cos':>8}")
+    print(f"{'torch (default)':<22} {baseline_rate:>9.1f} {1.0:>7.2f}x {1.0:>9.4f} {1.0:>8.4f}")
+    for name, factory in backends.items():
+        vectors, rate = measure(factory(), texts)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        agreement = (vectors * baseline_vectors).sum(axis=1)
+        print(f"{name:<22} {rate:>9.1f} {rate / baseline_rate:>7.2f}x {agreement.mean():>9.4f} {agreement.min():>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/quantization_benchmark.py - Recall vs memory for quantized vector storage
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.quantization import QuantizedVectorIndex, write_vector_index, normalize_rows, top_k
+
+
+def synthetic_corpus(count: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Clustered vectors, closer to sentence embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return normalize_rows(centers[labels] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized embedding recall vs memory benchmark")
+    parser.add_argument("--vectors", help="Existing vectors.f32.npy to benchmark instead of synthetic data")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pq-subspaces", type=int, default=48)
+    args = parser.parse_args()
+
+    if args.vectors:
+        corpus = normalize_rows(np.load(args.vectors, mmap_mode='r'))
+    else:
+        corpus = synthetic_corpus(args.count, args.dim)
+
+    rng = np.random.default_rng(1)
+    queries = normalize_rows(corpus[rng.choice(len(corpus), args.queries, replace=False)]
+                             + 0.3 * rng.normal(size=(args.queries, corpus.shape[1])).astype(np.float32))
+    truth = [set(top_k(corpus @ q, args.k).tolist()) for q in queries]
+    baseline_bytes = corpus.nbytes
+
+    print(f"{'format':<10} {'code MB':>9} {'vs f32':>7} {'recall@' + str(args.k):>10} "
+          f"{'scan-only':>10} {'ms/query':>9}")
+    for quantization in ('float32', 'float16', 'int8', 'pq'):
+        with tempfile.TemporaryDirectory() as directory:
+            write_vector_index(directory, corpus, quantization, args.pq_subspaces)
+            index = QuantizedVectorIndex(directory)
+
+            scan_hits, hits = 0, 0
+            start = time.perf_counter()
+            for query, expected in zip(queries, truth):
+                ids, _ = index.search(query, k=args.k)
+                hits += len(expected.intersection(ids.tolist()))
+            elapsed = time.perf_counter() - start
+            for query, expected in zip(queries, truth):
+                ids, _ = index.scan(query, args.k)
+                scan_hits += len(expected.intersection(ids.tolist()))
+
+            total = args.k * len(queries)
+            print(f"{quantization:<10} {index.codes.nbytes / 1e6:>9.1f} {index.codes.nbytes / baseline_bytes:>6.2f}x "
+                  f"{hits / total:>10.3f} {scan_hits / total:>10.3f} {elapsed * 1000 / len(queries):>9.2f}")
+            del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/rate_limit_benchmark.py - Per-check overhead of rate-limit storages
+import os
+import sys
+import time
+import argparse
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.rate_limit  # noqa: F401  registers leased+redis://
+
+
+def measure(storage, limit: str, checks: int, clients: int) -> float:
+    """Microseconds per hit() for a sliding-window-counter limiter on this storage"""
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    item = parse(limit)
+    storage.reset()
+    start = time.perf_counter()
+    for i in range(checks):
+        limiter.hit(item, f"client-{i % clients}")
+    return (time.perf_counter() - start) / checks * 1e6
+
+
+def check_spaced_requests(redis_url: str, limit: int = 20, ttl: float = 0.05):
+    """
+    A client whose requests are further apart than the allowance TTL must get
+    its whole limit: leases it never spends are handed back, not burned.
+    """
+    storage = storage_from_string(f"leased+{redis_url}", allowance_ttl=ttl)
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    item = parse(f"{limit} per hour")
+    storage.reset()
+    allowed = 0
+    for _ in range(limit):
+        allowed += limiter.hit(item, "spaced-client")
+        time.sleep(ttl * 2)
+    assert allowed == limit, f"only {allowed} of {limit} spaced requests allowed under '{limit} per hour'"
+    assert not limiter.hit(item, "spaced-client"), f"request {limit + 1} allowed under '{limit} per hour'"
+    print(f"spaced requests: {allowed}/{limit} allowed, request {limit + 1} refused")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate-limit storage benchmark")
+    parser.add_argument("--redis", default=os.environ.get("REDIS_URL", "redis://localhost:6379/1"))
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--limit", default="100000 per hour")
+    args = parser.parse_args()
+
+    storages = {
+        "memory (per worker)": lambda: storage_from_string("memory://"),
+        "redis (limits)": lambda: storage_from_string(args.redis),
+        "leased redis, no lease": lambda: storage_from_string(f"leased+{args.redis}", max_lease=1),
+        "leased redis": lambda: storage_from_string(f"leased+{args.redis}"),
+    }
+
+    print(f"{args.checks} checks over {args.clients} clients, limit '{args.limit}'")
+    print(f"{'storage':<24} {'us/check':>9} {'local hits':>11}")
+    for name, factory in storages.items():
+        try:
+            storage = factory()
+            per_check = measure(storage, args.limit, args.checks, args.clients)
+        except Exception as e:
+            print(f"{name:<24} unavailable: {e}")
+            continue
+        local = getattr(storage, "local_hits", None)
+        local = f"{local / args.checks:.0%}" if local is not None else "-"
+        print(f"{name:<24} {per_check:>9.1f} {local:>11}")
+
+    try:
+        check_spaced_requests(args.redis)
+    except AssertionError:
+        raise
+    except Exception as e:
+        print(f"spaced requests: unavailable: {e}")
+
+
+if __name__ == "__main__":
+    main()
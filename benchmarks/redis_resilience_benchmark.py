@@ -0,0 +1,99 @@
+# benchmarks/redis_resilience_benchmark.py - Session reads through ResilientStore under injected Redis faults
+import os
+import sys
+import time
+import json
+import argparse
+import redis
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.redis_store import ResilientStore, CircuitBreaker
+
+
+class FlakyRedis:
+    """
+    In-process Redis stand-in with injectable latency and outages. Calls slower
+    than the client timeout raise TimeoutError after waiting the timeout, as a
+    real socket read would.
+    """
+
+    def __init__(self, timeout: float = 0.1):
+        self.timeout = timeout
+        self.latency = 0.0
+        self.down = False
+        self.data = {}
+        self.calls = 0
+
+    def _io(self):
+        self.calls += 1
+        if self.down:
+            raise redis.ConnectionError("injected outage")
+        if self.latency >= self.timeout:
+            time.sleep(self.timeout)
+            raise redis.TimeoutError("injected latency")
+        time.sleep(self.latency)
+
+    def ping(self):
+        self._io()
+        return True
+
+    def get(self, key):
+        self._io()
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self._io()
+        self.data[key] = value
+
+    def delete(self, *keys):
+        self._io()
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def phase(store, fake, name, requests, sessions):
+    calls_before = fake.calls
+    start = time.perf_counter()
+    worst = 0.0
+    for i in range(requests):
+        t = time.perf_counter()
+        key = f"session:{i % sessions}"
+        history = json.loads(store.get(key) or "[]")
+        store.set(key, json.dumps(history[-4:] + [i]), 3600)
+        worst = max(worst, time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<26} {elapsed / requests * 1e3:>8.3f} {worst * 1e3:>8.1f} {fake.calls - calls_before:>7} "
+          f"{store.breaker.state:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ResilientStore fault-injection benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Healthy Redis round-trip")
+    args = parser.parse_args()
+
+    fake = FlakyRedis(timeout=0.1)
+    store = ResilientStore(client=fake, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.5))
+    no_near_cache = ResilientStore(client=fake, near_cache_ttl=0)
+
+    print(f"{'phase':<26} {'ms/req':>8} {'worst':>8} {'redis':>7} {'circuit':>10}")
+    fake.latency = args.latency_ms / 1000
+    phase(no_near_cache, fake, "healthy, no near-cache", args.requests, args.sessions)
+    phase(store, fake, "healthy, near-cache", args.requests, args.sessions)
+
+    fake.latency = 1.0  # hung Redis: every call would block for the full read timeout
+    phase(store, fake, "hung (breaker opens)", args.requests, args.sessions)
+
+    fake.latency, fake.down = args.latency_ms / 1000, True
+    phase(store, fake, "outage", args.requests, args.sessions)
+
+    fake.down = False
+    time.sleep(0.6)  # past reset_timeout: the next call is the half-open trial
+    phase(store, fake, "recovered", args.requests, args.sessions)
+    print("\nStore stats:", store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# benchmarks/security_benchmark.py - Microbenchmarks for SecurityManager.sanitize_input
+import os
+import re
+import sys
+import html
+import timeit
+import bleach
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.security import SecurityManager, PII_PATTERNS
+
+SAMPLES = {
+    "short": "What are the early symptoms of type 2 diabetes?",
+    "pii": "My SSN is 123-45-6789, call me at 555-123-4567 or mail jane.doe@example.com about my results",
+    "long": "I have had a persistent dry cough and mild fever for two weeks, " * 15,
+    "html": "<b>Chest pain</b> after exercise <script>alert(1)</script> is it serious?",
+}
+
+
+def legacy_sanitize(user_input: str) -> str:
+    """The previous implementation: escape, four uncompiled re.sub calls, then bleach"""
+    cleaned = html.escape(user_input)
+    for _, pattern in PII_PATTERNS:
+        cleaned = re.sub(pattern, '[REDACTED]', cleaned)
+    cleaned = bleach.clean(cleaned, tags=[], attributes={}, strip=True)
+    return cleaned.strip()
+
+
+def main():
+    manager = SecurityManager()
+    number = 20000
+    print(f"{'input':<7} {'legacy us':>10} {'current us':>11} {'speedup':>8}")
+    for name, text in SAMPLES.items():
+        legacy = min(timeit.repeat(lambda: legacy_sanitize(text), number=number, repeat=3)) / number * 1e6
+        current = min(timeit.repeat(lambda: manager.sanitize_input(text), number=number, repeat=3)) / number * 1e6
+        print(f"{name:<7} {legacy:>10.2f} {current:>11.2f} {legacy / current:>7.1f}x")
+
+    _, spans = manager.sanitize_input_with_spans(SAMPLES["pii"])
+    print("\nRedaction spans:", [(span.kind, span.start, span.end) for span in spans])
+
+
+if __name__ == "__main__":
+    main()
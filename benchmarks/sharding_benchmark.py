@@ -0,0 +1,52 @@
+# benchmarks/sharding_benchmark.py - Query latency vs shard count for local sharded search
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.quantization import QuantizedVectorIndex, write_vector_index, normalize_rows
+from src.sharding import ShardedSearcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded retrieval latency benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--quantization", default="int8")
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = normalize_rows(rng.normal(size=(args.queries, args.dim)).astype(np.float32))
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_vector_index(directory, rng.normal(size=(args.count, args.dim)).astype(np.float32), args.quantization)
+
+        shard_counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i <= args.max_shards], args.max_shards})
+        baseline = None
+        print(f"{'shards':>6} {'p50 ms':>8} {'p99 ms':>8} {'speedup':>8}")
+        for shards in shard_counts:
+            index = QuantizedVectorIndex(directory)
+            searcher = ShardedSearcher(index, shards, min_vectors=0)
+            searcher.search(queries[0], k=args.k)  # warm the pool
+
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                searcher.search(query, k=args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+            searcher.close()
+
+            p50, p99 = np.percentile(latencies, [50, 99])
+            baseline = baseline or p50
+            print(f"{shards:>6} {p50:>8.2f} {p99:>8.2f} {baseline / p50:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
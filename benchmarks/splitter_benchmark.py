@@ -0,0 +1,71 @@
+# benchmarks/splitter_benchmark.py - Sentence-aware splitter vs RecursiveCharacterTextSplitter throughput
+import os
+import re
+import sys
+import time
+import argparse
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.text_splitter import split_documents, count_tokens
+
+PAGE = """CHAPTER 12 CARDIOVASCULAR DISORDERS
+Hypertension is defined as a sustained systolic blood pressure of 140 mm Hg or more, or a diastolic
+pressure of 90 mm Hg or more. Dr. Lewis et al. reported that most cases are primary, e.g. without an
+identifiable cause. Secondary hypertension accounts for 5-10% of cases! Screening starts at age 18.
+
+Table 12.1 Blood Pressure Categories
+Category        Systolic     Diastolic
+Normal          <120         <80
+Elevated        120-129      <80
+Stage 1         130-139      80-89
+
+12.2 Treatment
+Lifestyle modification is recommended for all patients. Thiazide diuretics, ACE inhibitors and calcium
+channel blockers are first-line agents. Follow-up visits every 3-6 months are advised until blood
+pressure is controlled, after which annual review is usually sufficient.
+"""
+
+# A chunk is clean if it ends at sentence punctuation, a table row or a heading (no trailing fragment)
+CLEAN_END = re.compile(r"[.!?:\"')\]]\s*$|\d\s*$|^[A-Z0-9 .]+$", re.M)
+
+
+def load_pages(data: str, synthetic_pages: int):
+    if data:
+        from src.helper import load_pdf_file, filter_to_minimal_docs
+        return filter_to_minimal_docs(load_pdf_file(data))
+    return [Document(page_content=PAGE * 3, metadata={"source": "synthetic.pdf", "page": i})
+            for i in range(synthetic_pages)]
+
+
+def report(name: str, pages, split):
+    start = time.perf_counter()
+    chunks = split(pages)
+    elapsed = time.perf_counter() - start
+    megabytes = sum(len(page.page_content.encode("utf-8")) for page in pages) / 1e6
+    tokens = [count_tokens(chunk.page_content) for chunk in chunks]
+    clean = sum(1 for chunk in chunks if CLEAN_END.search(chunk.page_content.splitlines()[-1]))
+    print(f"{name:<24} {len(pages) / elapsed:>9.0f} {megabytes / elapsed:>7.2f} {len(chunks):>7} "
+          f"{sum(tokens) / len(tokens):>7.1f} {max(tokens):>6} {clean / len(chunks):>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text splitter throughput benchmark")
+    parser.add_argument("--data", help="PDF directory (parsed through the page cache); synthetic pages otherwise")
+    parser.add_argument("--pages", type=int, default=5000, help="Synthetic page count")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pages = load_pages(args.data, args.pages)
+    recursive = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=20)
+
+    print(f"{'splitter':<24} {'pages/s':>9} {'MB/s':>7} {'chunks':>7} {'tokens':>7} {'max':>6} {'clean':>7}")
+    report("recursive 500/20 chars", pages, recursive.split_documents)
+    report("sentence, 1 process", pages, lambda docs: split_documents(docs, workers=1))
+    report(f"sentence, {args.workers} processes", pages, lambda docs: split_documents(docs, workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/stream_filter_benchmark.py - Per-chunk cost of the streaming output filter
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.security import SecurityManager
+from src.stream_filter import StreamingOutputFilter
+
+ANSWER = ("Type 2 diabetes often starts with increased thirst, frequent urination and fatigue. "
+          "If you notice chest pain or shortness of breath, treat it as an emergency. "
+          "Your clinic can be reached at 555-123-4567 or care.team@example.com for follow-up. ") * 8
+
+
+def tokens(text: str):
+    """LLM-like chunks: a leading space plus a word or punctuation mark"""
+    return re.findall(r'\s*\S+', text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming output filter benchmark")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    chunks = tokens(ANSWER)
+    manager = SecurityManager()
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        output_filter = StreamingOutputFilter()
+        for chunk in chunks:
+            output_filter.feed(chunk)
+        output_filter.flush()
+    streamed = (time.perf_counter() - start) / (args.repeat * len(chunks)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        manager.redact_pii(ANSWER)
+        manager.detect_medical_emergency(ANSWER)
+    buffered = (time.perf_counter() - start) / args.repeat * 1e3
+
+    # How many chunks in does the first text come out, and how far behind does the output run
+    output_filter = StreamingOutputFilter()
+    first_emit = None
+    max_lag = 0
+    for i, chunk in enumerate(chunks):
+        safe, _ = output_filter.feed(chunk)
+        max_lag = max(max_lag, len(output_filter._pending))
+        if safe and first_emit is None:
+            first_emit = i
+    print(f"{len(chunks)} chunks, {len(ANSWER)} chars")
+    print(f"streaming filter:      {streamed:.2f} us/chunk")
+    print(f"buffer-then-scan:      {buffered:.3f} ms per answer, first text only after the last chunk")
+    print(f"first text emitted at: chunk {first_emit} (0 = the very first)")
+    print(f"max chars held back:   {max_lag}")
+    print("\nFiltered:", StreamingOutputFilter().scan(ANSWER)[0][:240], "...")
+
+
+if __name__ == "__main__":
+    main()
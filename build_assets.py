@@ -0,0 +1,17 @@
+# build_assets.py - Fingerprint and precompress static assets for immutable caching
+import logging
+from src.assets import build_assets
+from config import Config
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    manifest = build_assets(Config.STATIC_DIR, Config.ASSET_BUILD_DIR)
+    print(f"✓ Built asset version {manifest['version']}")
+    for name, hashed in manifest["assets"].items():
+        print(f"   • {name} → {hashed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,20 @@ class Config:
     PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
 
     # Rate Limiting
-    RATELIMIT_STORAGE_URL = "redis://localhost:6379/1" if os.environ.get('REDIS_URL') else "memory://"
+    # Shared Redis for sessions, caches and rate limits; strict timeouts, breaker falls back to in-process storage
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    REDIS_MAX_CONNECTIONS = 50
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('MEDIBOT_REDIS_TIMEOUT', 0.1))  # seconds, connect and read
+    REDIS_BREAKER_FAILURES = 3
+    REDIS_BREAKER_RESET_SECONDS = 10
+    REDIS_NEAR_CACHE_TTL = 2.0  # seconds a worker reuses a Redis read
+
+    # Shared across workers when Redis is configured; each worker counts on its own otherwise
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL') or (
+        f"leased+{os.environ['REDIS_URL']}" if os.environ.get('REDIS_URL') else "memory://")
+    RATELIMIT_STRATEGY = 'sliding-window-counter'
+    RATELIMIT_ALLOWANCE_TTL = 1.0  # seconds a worker may spend permits leased from Redis
+    RATELIMIT_MAX_LEASE = 16
 
     # Medical AI Configuration
     MAX_QUERY_LENGTH = 1000
@@ -23,6 +36,55 @@ class Config:
     VECTOR_SEARCH_K = 8
     HYBRID_SEARCH_WEIGHT = 0.7
     RERANK_TOP_K = 5
+    LOCAL_INDEX_DIR = os.environ.get('MEDIBOT_INDEX_DIR', 'index')
+    PARSE_CACHE_DIR = os.environ.get('MEDIBOT_PARSE_CACHE_DIR', '.cache/pages')
+    TEXT_SPLITTER = os.environ.get('MEDIBOT_TEXT_SPLITTER', 'sentence')  # 'sentence' or 'recursive' (LangChain)
+    CHUNK_MAX_TOKENS = 128  # sentence splitter; MiniLM truncates inputs at 256 word pieces
+    CHUNK_OVERLAP_TOKENS = 16
+    SPLIT_WORKERS = int(os.environ.get('MEDIBOT_SPLIT_WORKERS', 0))  # 0 = one process per CPU
+    EMBEDDING_CACHE_DIR = os.environ.get('MEDIBOT_EMBEDDING_CACHE_DIR', '.cache/embeddings')
+    VECTOR_INDEX_BACKEND = os.environ.get('MEDIBOT_VECTOR_BACKEND', 'pinecone')  # 'pinecone' or 'local'
+    EMBEDDING_QUANTIZATION = os.environ.get('MEDIBOT_QUANTIZATION', 'int8')  # float32, float16, int8 or pq
+    PQ_SUBSPACES = 48
+    RESCORE_FACTOR = 4
+    SEARCH_SHARDS = int(os.environ.get('MEDIBOT_SEARCH_SHARDS', 1))
+    SHARD_MIN_VECTORS = 200_000  # below this, search in-process without a worker pool
+    QUERY_EXPANSION = True  # search clinical synonyms of lay terms alongside the original query
+    CREDIBILITY_WEIGHT = float(os.environ.get('MEDIBOT_CREDIBILITY_WEIGHT', 0.0))  # rerank bonus per unit of source credibility; 0 keeps the default ranking
+    INDEX_RELOAD_INTERVAL = int(os.environ.get('MEDIBOT_INDEX_RELOAD_INTERVAL', 30))  # seconds; 0 disables the watcher
+
+    # Operational endpoints under /admin are disabled unless a token is set
+    ADMIN_TOKEN = os.environ.get('MEDIBOT_ADMIN_TOKEN')
+
+    # Embedding backend: 'torch' (sentence-transformers) or 'onnx' (ONNX Runtime)
+    EMBEDDING_BACKEND = os.environ.get('MEDIBOT_EMBEDDING_BACKEND', 'torch')
+    EMBEDDING_THREADS = int(os.environ.get('MEDIBOT_EMBEDDING_THREADS', 0))  # 0 = library default; set per gunicorn worker
+    EMBEDDING_BATCH_SIZE = int(os.environ.get('MEDIBOT_EMBEDDING_BATCH_SIZE', 64))
+    EMBEDDING_ONNX_INT8 = os.environ.get('MEDIBOT_EMBEDDING_ONNX_INT8', '1') == '1'
+    ONNX_MODEL_DIR = os.environ.get('MEDIBOT_ONNX_MODEL_DIR', '.cache/onnx/all-MiniLM-L6-v2')
+
+    # Speculative retrieval while typing
+    PREFETCH_TTL_SECONDS = 30
+    PREFETCH_MIN_CHARS = 8
+    PREFETCH_SIMILARITY = 0.8  # word-overlap needed to reuse a draft's retrieval
+
+    # Sampled request profiling (speedscope or collapsed stacks written to PROFILE_DIR)
+    PROFILE_SAMPLE_RATE = float(os.environ.get('MEDIBOT_PROFILE_SAMPLE_RATE', 0.0))  # fraction of /get requests
+    PROFILE_INTERVAL_MS = 5
+    PROFILE_FORMAT = os.environ.get('MEDIBOT_PROFILE_FORMAT', 'speedscope')  # 'speedscope' or 'collapsed'
+    PROFILE_DIR = os.environ.get('MEDIBOT_PROFILE_DIR', 'profiles')
+    PROFILE_SETTINGS_TTL_SECONDS = 86400  # /admin/profiling changes revert to the defaults above after this
+
+    # Opt-in traffic capture for load replay (PII-redacted gzip JSONL, one file per worker)
+    TRAFFIC_CAPTURE_DIR = os.environ.get('MEDIBOT_TRAFFIC_CAPTURE_DIR')  # unset disables capture
+    TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.environ.get('MEDIBOT_TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0))
+
+    # Batch question API
+    BATCH_MAX_QUESTIONS = 50
+
+    # Fingerprinted, precompressed static assets written by build_assets.py
+    STATIC_DIR = 'static'
+    ASSET_BUILD_DIR = os.environ.get('MEDIBOT_ASSET_BUILD_DIR', 'static/dist')
 
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -0,0 +1,135 @@
+# evaluate_retrieval.py - Retrieval quality vs latency evaluation harness
+import os
+import json
+import time
+import logging
+import argparse
+import resource
+from itertools import product
+from dotenv import load_dotenv
+from src.helper import load_pdf_file, filter_to_minimal_docs, text_split, download_hugging_face_embeddings
+from src.docstore import write_docstore, ChunkTextStore
+from src.quantization import write_vector_index, QuantizedVectorIndex
+from src.embedding_cache import EmbeddingCache, CachedEmbeddings
+from src.evaluation import load_labelled_queries, matching_label, score_ranking, percentile
+from src.medical_rag import AdvancedMedicalRAG
+from config import Config
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_list(value: str, cast=str):
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def parse_weight(value: str):
+    return None if value.lower() == 'none' else float(value)
+
+
+def build_local_index(directory: str, chunks, vectors, quantization: str):
+    """Write a docstore plus quantized vectors for one chunking setting"""
+    write_docstore(directory, chunks)
+    write_vector_index(directory, vectors, quantization, Config.PQ_SUBSPACES)
+
+
+def evaluate(rag: AdvancedMedicalRAG, queries, k: int):
+    """Run every query once at this k; returns mean metrics and per-query latencies"""
+    totals = {"recall": 0.0, "mrr": 0.0, "ndcg": 0.0}
+    latencies = []
+    for item in queries:
+        start = time.perf_counter()
+        results = rag.hybrid_search(item["query"], k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        hits = [matching_label(chunk.source, chunk.page, item["relevant"]) for chunk in results]
+        for name, value in score_ranking(hits, len(item["relevant"]), k).items():
+            totals[name] += value
+    return {name: value / len(queries) for name, value in totals.items()}, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality against latency and memory")
+    parser.add_argument("queries", help="JSONL of {query, relevant: [{source, page}]}")
+    parser.add_argument("--data", default="data/", help="PDF directory for local index builds")
+    parser.add_argument("--k", default="3,5,8")
+    parser.add_argument("--splitter", default=Config.TEXT_SPLITTER, choices=["sentence", "recursive"])
+    parser.add_argument("--chunk-sizes", default=None,
+                        help="Comma list; tokens for the sentence splitter, characters for recursive")
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    parser.add_argument("--rerank", default="on,off")
+    parser.add_argument("--hybrid-weights", default="none",
+                        help="Comma list; 'none' keeps term-only reranking")
+    parser.add_argument("--backends", default="local:int8",
+                        help="Comma list of local:<quantization> and/or pinecone (uses the built index)")
+    parser.add_argument("--work-dir", default=".cache/eval")
+    parser.add_argument("--output", help="Also write the result rows as JSON")
+    args = parser.parse_args()
+    if args.chunk_sizes is None:
+        args.chunk_sizes = str(Config.CHUNK_MAX_TOKENS) if args.splitter == 'sentence' else "500"
+    if args.chunk_overlap is None:
+        args.chunk_overlap = Config.CHUNK_OVERLAP_TOKENS if args.splitter == 'sentence' else 20
+
+    load_dotenv()
+    queries = load_labelled_queries(args.queries)
+    ks = parse_list(args.k, int)
+    backends = parse_list(args.backends)
+    combos = list(product([v == 'on' for v in parse_list(args.rerank)], parse_list(args.hybrid_weights, parse_weight)))
+
+    embeddings = download_hugging_face_embeddings()
+    pages = None
+    rows = []
+
+    def run(label_backend, chunk_size, rag, index_mb):
+        for rerank, weight in combos:
+            rag.medical_reranking = rerank
+            rag.hybrid_weight = weight
+            for k in ks:
+                metrics, latencies = evaluate(rag, queries, k)
+                rows.append({
+                    "backend": label_backend, "chunk_size": chunk_size, "rerank": rerank,
+                    "hybrid_weight": weight, "k": k, **metrics,
+                    "p50_ms": percentile(latencies, 50), "p99_ms": percentile(latencies, 99),
+                    "index_mb": index_mb,
+                    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                })
+
+    for backend in backends:
+        if backend == 'pinecone':
+            rag = AdvancedMedicalRAG(embeddings, "medical-chatbot", docstore_dir=Config.LOCAL_INDEX_DIR)
+            run('pinecone', 'index', rag, 0.0)
+            continue
+
+        quantization = backend.split(':', 1)[1] if ':' in backend else Config.EMBEDDING_QUANTIZATION
+        for chunk_size in parse_list(args.chunk_sizes, int):
+            directory = os.path.join(args.work_dir,
+                                     f"{args.splitter}-cs{chunk_size}-ov{args.chunk_overlap}-{quantization}")
+            if not (ChunkTextStore.exists(directory) and QuantizedVectorIndex.exists(directory)):
+                # Pages come from the parse cache and vectors from the embedding cache
+                if pages is None:
+                    pages = filter_to_minimal_docs(load_pdf_file(args.data))
+                chunks = text_split(pages, chunk_size, args.chunk_overlap, args.splitter)
+                cached = CachedEmbeddings(embeddings, EmbeddingCache(Config.EMBEDDING_CACHE_DIR, 384))
+                vectors = cached.embed_documents_array([chunk.page_content for chunk in chunks])
+                build_local_index(directory, chunks, vectors, quantization)
+
+            rag = AdvancedMedicalRAG(embeddings, "medical-chatbot", docstore_dir=directory, vector_backend='local')
+            run(backend, chunk_size, rag, rag.local_index.codes.nbytes / 1e6)
+
+    header = (f"{'backend':<14} {'chunk':>6} {'rerank':>6} {'weight':>6} {'k':>3} {'recall':>7} {'mrr':>6} "
+              f"{'ndcg':>6} {'p50 ms':>7} {'p99 ms':>7} {'index MB':>9} {'rss MB':>7}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        weight = '-' if row['hybrid_weight'] is None else f"{row['hybrid_weight']:.2f}"
+        print(f"{row['backend']:<14} {str(row['chunk_size']):>6} {'on' if row['rerank'] else 'off':>6} {weight:>6} "
+              f"{row['k']:>3} {row['recall']:>7.3f} {row['mrr']:>6.3f} {row['ndcg']:>6.3f} {row['p50_ms']:>7.1f} "
+              f"{row['p99_ms']:>7.1f} {row['index_mb']:>9.1f} {row['rss_mb']:>7.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
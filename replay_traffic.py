@@ -0,0 +1,144 @@
+# replay_traffic.py - Replay captured traffic against a local instance and diff latency distributions
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from src.traffic_capture import load_trace, latency_summary
+
+METRICS = ["ttfb_ms", "first_token_ms", "total_ms"]
+
+
+def replay_request(target: str, record: dict, admin_token: str, timeout: float) -> dict:
+    """Issue one captured /get request and time the SSE stream from the client side"""
+    query = urllib.parse.urlencode({"msg": record["query"], "session_id": f"replay-{record.get('session', 'anon')}"})
+    request = urllib.request.Request(f"{target.rstrip('/')}/get?{query}", headers={"X-Admin-Token": admin_token})
+    result = {"t": record["t"], "query_type": record.get("query_type"), "chars": record.get("chars")}
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result["status"] = response.status
+            for raw in response:
+                line = raw.decode('utf-8').strip()
+                if not line.startswith("data:"):
+                    continue
+                elapsed = (time.perf_counter() - start) * 1000
+                result.setdefault("ttfb_ms", elapsed)
+                event = json.loads(line[5:])
+                if event.get("type") == "answer_chunk":
+                    result.setdefault("first_token_ms", elapsed)
+                elif event.get("type") == "error":
+                    result["error"] = event.get("content")
+    except Exception as e:
+        result["error"] = str(e)
+    result["total_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def run(args):
+    trace = load_trace(args.traces)[:args.limit or None]
+    if not trace:
+        sys.exit("No requests in trace")
+    print(f"Replaying {len(trace)} requests against {args.target} at "
+          f"{'max speed' if args.speed <= 0 else f'{args.speed:g}x'}")
+
+    results = []
+    lock = threading.Lock()
+
+    def issue(record, due):
+        result = replay_request(args.target, record, args.admin_token, args.timeout)
+        result["lag_ms"] = due
+        with lock:
+            results.append(result)
+
+    first = trace[0]["t"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for record in trace:
+            # Keep the captured inter-arrival gaps, scaled by speed; 0 sends as fast as the pool allows
+            due = (record["t"] - first) / args.speed if args.speed > 0 else 0.0
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(issue, record, (time.perf_counter() - started - due) * 1000)
+    wall = time.perf_counter() - started
+
+    errors = sum(1 for result in results if "error" in result)
+    print(f"✓ {len(results)} requests in {wall:.1f}s ({len(results) / wall:.1f} req/s), {errors} errors")
+    print_summary({metric: latency_summary([r[metric] for r in results if metric in r]) for metric in METRICS})
+
+    with open(args.output, 'w') as f:
+        json.dump({"target": args.target, "speed": args.speed, "concurrency": args.concurrency,
+                   "wall_s": round(wall, 2), "results": sorted(results, key=lambda r: r["t"])}, f)
+    print(f"✓ Results written to {args.output}")
+
+
+def print_summary(summary: dict):
+    print(f"{'metric':<16} {'count':>6} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    for metric, stats in summary.items():
+        if stats:
+            print(f"{metric:<16} {stats['count']:>6} " +
+                  " ".join(f"{stats[key]:>9.1f}" for key in ("mean", "p50", "p90", "p99", "max")))
+
+
+def diff(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["results"]
+
+    def summarize(results, metric, query_type=None):
+        return latency_summary([r[metric] for r in results
+                                if metric in r and "error" not in r
+                                and (query_type is None or r.get("query_type") == query_type)])
+
+    print(f"{'metric':<24} {'stat':>5} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    groups = [(None, metric) for metric in METRICS]
+    groups += [(query_type, "total_ms") for query_type in sorted({r.get("query_type") or "-" for r in baseline})]
+    for query_type, metric in groups:
+        before = summarize(baseline, metric, query_type)
+        after = summarize(candidate, metric, query_type)
+        if not before or not after:
+            continue
+        label = metric if query_type is None else f"{metric}[{query_type}]"
+        for stat in ("p50", "p90", "p99"):
+            change = (after[stat] - before[stat]) / before[stat] * 100 if before[stat] else 0.0
+            print(f"{label:<24} {stat:>5} {before[stat]:>10.1f} {after[stat]:>10.1f} {change:>+7.1f}%")
+
+    for name, results in (("baseline", baseline), ("candidate", candidate)):
+        errors = sum(1 for r in results if "error" in r)
+        if errors:
+            print(f"⚠️ {name}: {errors} of {len(results)} requests failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured MediBot traffic and compare builds")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay = commands.add_parser("run", help="Re-issue a captured trace against an instance")
+    replay.add_argument("traces", nargs="+", help="trace-*.jsonl.gz files written by traffic capture")
+    replay.add_argument("--target", default="http://localhost:8080")
+    replay.add_argument("--speed", type=float, default=1.0, help="Arrival-rate multiplier; 0 replays at max speed")
+    replay.add_argument("--concurrency", type=int, default=32, help="Maximum requests in flight")
+    replay.add_argument("--limit", type=int, default=0, help="Only replay the first N requests")
+    replay.add_argument("--timeout", type=float, default=120.0)
+    replay.add_argument("--admin-token", default=os.environ.get("MEDIBOT_ADMIN_TOKEN", ""),
+                        help="Exempts replayed requests from rate limits")
+    replay.add_argument("--output", default="replay-results.json")
+    replay.set_defaults(func=run)
+
+    compare = commands.add_parser("diff", help="Compare latency distributions of two replay runs")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.set_defaults(func=diff)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import os
+import json
+import gzip
+import hashlib
+import logging
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli variants are skipped; gzip still works everywhere
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSET_FILES = ["style.css", "enhanced-chat.js", "manifest.json"]
+MANIFEST_FILE = "asset-manifest.json"
+# Clients pick the first encoding they accept, in this order
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def fingerprinted_name(name: str, data: bytes) -> str:
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+
+
+def build_assets(static_dir: str, output_dir: str, files=ASSET_FILES) -> dict:
+    """
+    Copy each asset to a content-hashed name with .gz (and .br) siblings and
+    write the manifest mapping logical names to hashed ones. The manifest
+    version changes whenever any asset does.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    assets = {}
+    for name in files:
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        hashed = fingerprinted_name(name, data)
+        path = os.path.join(output_dir, hashed)
+        with open(path, 'wb') as f:
+            f.write(data)
+        with open(path + ".gz", 'wb') as f:
+            # mtime=0 keeps rebuilds of unchanged assets byte-identical
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + ".br", 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+        assets[name] = hashed
+
+    manifest = {
+        "version": hashlib.sha256(json.dumps(assets, sort_keys=True).encode()).hexdigest()[:12],
+        "assets": assets,
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Drop files from previous builds that the manifest no longer references
+    current = set(assets.values())
+    for entry in os.listdir(output_dir):
+        base = entry[:-3] if entry.endswith(('.gz', '.br')) else entry
+        if entry != MANIFEST_FILE and base not in current:
+            os.remove(os.path.join(output_dir, entry))
+    logger.info(f"Built {len(assets)} assets into {output_dir} (version {manifest['version']})")
+    return manifest
+
+
+def load_manifest(output_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def precompressed_variant(path: str, accept_encoding: str) -> Optional[tuple]:
+    """(encoding, path) of the best precompressed file the client accepts, if one exists"""
+    accepted = {part.split(';')[0].strip() for part in accept_encoding.lower().split(',')}
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.exists(path + suffix):
+            return encoding, path + suffix
+    return None
+
+
+class AssetManifest:
+    """Resolves logical asset names to hashed URLs; plain static URLs when no build exists"""
+
+    def __init__(self, output_dir: str, url_prefix: str = "/assets"):
+        self.output_dir = output_dir
+        self.url_prefix = url_prefix
+        manifest = load_manifest(output_dir) or {}
+        self.version: Optional[str] = manifest.get("version")
+        self.assets: Dict[str, str] = manifest.get("assets", {})
+        if not self.assets:
+            logger.info("No asset manifest found; serving unhashed static files")
+
+    def url(self, name: str) -> str:
+        hashed = self.assets.get(name)
+        return f"{self.url_prefix}/{hashed}" if hashed else f"/static/{name}"
@@ -0,0 +1,92 @@
+from typing import Optional
+from langchain.schema import Document
+from src.source_metadata import cached_source_info
+
+
+class MedicalChunk:
+    """Compact retrieval record used between vector search and prompt building.
+
+    Holds only the chunk id, its score and the little metadata the RAG
+    pipeline reads. Text is either a reference to the string returned by
+    the vector store, or fetched lazily from the local docstore the first
+    time it is read.
+    """
+
+    __slots__ = ('chunk_id', 'score', 'source', 'page', 'source_id', '_text', '_store')
+
+    def __init__(self, chunk_id: Optional[str], score: float = 0.0, source: str = 'Unknown Source',
+                 page: Optional[int] = None, text: Optional[str] = "", store=None, source_id: Optional[int] = None):
+        self.chunk_id = chunk_id
+        self.score = score
+        self.source = source
+        self.page = page
+        self.source_id = source_id
+        self._text = text
+        self._store = store
+
+    @property
+    def source_info(self):
+        """Precomputed display name and credibility from the docstore's source table"""
+        if self._store is not None and self.source_id is not None:
+            return self._store.source_table[self.source_id]
+        return cached_source_info(self.source)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._store.get_text(self.chunk_id) if self._store is not None else ""
+        return self._text
+
+    @classmethod
+    def from_store(cls, store, chunk_id, score: float = 0.0) -> "MedicalChunk":
+        """Build a record from a docstore row; text stays on disk until first read"""
+        source_id = store.get_source_id(chunk_id)
+        return cls(
+            chunk_id=str(chunk_id),
+            score=float(score),
+            source=store.sources[source_id],
+            page=store.get_page(chunk_id),
+            text=None,
+            store=store,
+            source_id=source_id,
+        )
+
+    @classmethod
+    def from_document(cls, doc: Document, score: float = 0.0) -> "MedicalChunk":
+        """Adapter from a LangChain Document returned by the vector store"""
+        metadata = doc.metadata or {}
+        return cls(
+            chunk_id=getattr(doc, 'id', None),
+            score=float(score),
+            source=metadata.get('source') or 'Unknown Source',
+            page=metadata.get('page'),
+            text=doc.page_content,
+        )
+
+    def to_record(self) -> list:
+        """Compact JSON-safe form; chunks backed by a docstore keep only their id and score"""
+        if self._store is not None:
+            return [self.chunk_id, self.score]
+        return [self.chunk_id, self.score, self.source, self.page, self.text]
+
+    @classmethod
+    def from_record(cls, record: list, store=None) -> "MedicalChunk":
+        """Inverse of to_record; id-only records are resolved against store"""
+        if len(record) == 2:
+            return cls.from_store(store, record[0], record[1])
+        chunk_id, score, source, page, text = record
+        return cls(chunk_id=chunk_id, score=score, source=source, page=page, text=text)
+
+    def belongs_to(self, store) -> bool:
+        """True if the text is held in memory or read from this docstore"""
+        return self._store is None or self._store is store
+
+    def to_document(self) -> Document:
+        """Adapter back to a LangChain Document for chains that expect one"""
+        metadata = {"source": self.source}
+        if self.page is not None:
+            metadata["page"] = self.page
+        return Document(page_content=self.text, metadata=metadata)
+
+    def __repr__(self) -> str:
+        return f"MedicalChunk(id={self.chunk_id!r}, score={self.score:.4f}, source={self.source!r})"
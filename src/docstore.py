@@ -0,0 +1,122 @@
+import os
+import json
+import mmap
+import logging
+from array import array
+from typing import Iterable, Optional
+import numpy as np
+from langchain.schema import Document
+from src.source_metadata import build_source_table
+
+logger = logging.getLogger(__name__)
+
+TEXT_FILE = "chunks.txt"
+OFFSETS_FILE = "offsets.npy"
+SOURCE_IDS_FILE = "source_ids.npy"
+PAGES_FILE = "pages.npy"
+SOURCES_FILE = "sources.json"
+SOURCE_TABLE_FILE = "source_table.json"
+
+
+def write_docstore(directory: str, chunks: Iterable[Document]) -> int:
+    """
+    Write chunk texts as one contiguous UTF-8 blob plus an offsets array.
+    The chunk id is the row number, which is also the vector id in the index.
+    Returns the number of chunks written.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    offsets = array('q', [0])
+    source_ids = array('i')
+    pages = array('i')
+    sources = {}
+
+    with open(os.path.join(directory, TEXT_FILE), 'wb') as blob:
+        position = 0
+        for chunk in chunks:
+            data = chunk.page_content.encode('utf-8')
+            blob.write(data)
+            position += len(data)
+            offsets.append(position)
+
+            source = chunk.metadata.get('source') or 'Unknown Source'
+            source_ids.append(sources.setdefault(source, len(sources)))
+            page = chunk.metadata.get('page')
+            pages.append(int(page) if page is not None else -1)
+
+    np.save(os.path.join(directory, OFFSETS_FILE), np.frombuffer(offsets, dtype=np.int64))
+    np.save(os.path.join(directory, SOURCE_IDS_FILE), np.frombuffer(source_ids, dtype=np.int32))
+    np.save(os.path.join(directory, PAGES_FILE), np.frombuffer(pages, dtype=np.int32))
+    with open(os.path.join(directory, SOURCES_FILE), 'w') as f:
+        json.dump(list(sources), f)
+    # Display names and credibility are computed here once, not per query
+    with open(os.path.join(directory, SOURCE_TABLE_FILE), 'w') as f:
+        json.dump(build_source_table(list(sources)), f)
+
+    count = len(offsets) - 1
+    logger.info(f"Wrote {count} chunks to docstore at {directory}")
+    return count
+
+
+class ChunkTextStore:
+    """Read-only, memory-mapped chunk text store written by write_docstore"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode='r')
+        self.source_ids = np.load(os.path.join(directory, SOURCE_IDS_FILE), mmap_mode='r')
+        self.pages = np.load(os.path.join(directory, PAGES_FILE), mmap_mode='r')
+        with open(os.path.join(directory, SOURCES_FILE)) as f:
+            self.sources = json.load(f)
+        table_path = os.path.join(directory, SOURCE_TABLE_FILE)
+        if os.path.exists(table_path):
+            with open(table_path) as f:
+                self.source_table = json.load(f)
+        else:
+            self.source_table = build_source_table(self.sources)
+        # Source path -> precomputed metadata, for callers that only have the path
+        self.source_info = dict(zip(self.sources, self.source_table))
+
+        self._file = open(os.path.join(directory, TEXT_FILE), 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._view = memoryview(self._blob)
+        logger.info(f"Opened docstore with {len(self)} chunks from {directory}")
+
+    @staticmethod
+    def exists(directory: Optional[str]) -> bool:
+        return bool(directory) and os.path.exists(os.path.join(directory, OFFSETS_FILE))
+
+    def __len__(self) -> int:
+        return max(len(self.offsets) - 1, 0)
+
+    def __contains__(self, chunk_id) -> bool:
+        try:
+            return 0 <= int(chunk_id) < len(self)
+        except (TypeError, ValueError):
+            return False
+
+    def get_bytes(self, chunk_id) -> memoryview:
+        """Zero-copy view of a chunk's UTF-8 bytes"""
+        row = int(chunk_id)
+        return self._view[int(self.offsets[row]):int(self.offsets[row + 1])]
+
+    def get_text(self, chunk_id) -> str:
+        return str(self.get_bytes(chunk_id), 'utf-8')
+
+    def get_source_id(self, chunk_id) -> int:
+        return int(self.source_ids[int(chunk_id)])
+
+    def get_source(self, chunk_id) -> str:
+        return self.sources[self.get_source_id(chunk_id)]
+
+    def get_page(self, chunk_id) -> Optional[int]:
+        page = int(self.pages[int(chunk_id)])
+        return page if page >= 0 else None
+
+    def close(self):
+        self._view.release()
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
@@ -0,0 +1,136 @@
+import os
+import shutil
+import inspect
+import tempfile
+import logging
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2 truncates at 256 word pieces
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model.int8.onnx"
+
+
+def configure_torch_threads(threads: int):
+    """Pin torch's intra-op pool so several gunicorn workers do not oversubscribe cores"""
+    import torch
+    if threads > 0:
+        torch.set_num_threads(threads)
+        logger.info(f"Torch embedding threads: {threads}")
+
+
+def export_onnx_model(output_dir: str, model_name: str = MODEL_NAME, quantize: bool = True) -> str:
+    """
+    Export the transformer to ONNX (and a dynamically int8-quantized copy).
+    Needs torch and transformers, which sentence-transformers already pulls in.
+    Returns the path of the model file to load.
+
+    Several gunicorn workers may export at once on first use, so everything
+    is written to a private temporary directory and moved into output_dir
+    with os.replace, model files last: readers never see a partial file.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".export-", dir=output_dir)
+    try:
+        _export(work_dir, model_name, quantize)
+        model_files = {FP32_MODEL_FILE, INT8_MODEL_FILE}
+        names = os.listdir(work_dir)
+        for name in sorted(names, key=lambda name: name in model_files):
+            os.replace(os.path.join(work_dir, name), os.path.join(output_dir, name))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    model_path = os.path.join(output_dir, INT8_MODEL_FILE if quantize else FP32_MODEL_FILE)
+    logger.info(f"Exported ONNX model to {model_path}")
+    return model_path
+
+
+def _export(output_dir: str, model_name: str, quantize: bool):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILE)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ("input_ids", "attention_mask", "token_type_ids")}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    export_kwargs = dict(
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+    )
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        # Newer torch defaults to the dynamo exporter, which needs onnxscript; use the TorchScript one
+        export_kwargs["dynamo"] = False
+
+    class _Encoder(torch.nn.Module):
+        """Keyword-only call into the transformer, so positional argument order does not matter"""
+
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.transformer(input_ids=input_ids, attention_mask=attention_mask,
+                                    token_type_ids=token_type_ids)[0]
+
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    with torch.no_grad():
+        torch.onnx.export(_Encoder(model), inputs, fp32_path, **export_kwargs)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(output_dir, INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """all-MiniLM-L6-v2 on ONNX Runtime: mean pooling plus L2 normalization, as sentence-transformers does"""
+
+    def __init__(self, model_dir: str, int8: bool = True, threads: int = 0, batch_size: int = 64,
+                 model_name: str = MODEL_NAME):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_file = os.path.join(model_dir, INT8_MODEL_FILE if int8 else FP32_MODEL_FILE)
+        if not os.path.exists(model_file):
+            export_onnx_model(model_dir, model_name, quantize=int8)
+
+        options = ort.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.batch_size = batch_size
+        # Backend and precision are part of the name: the embedding cache keys on it, and int8
+        # vectors must not be served where fp32 torch vectors were computed (or the reverse)
+        self.model_name = f"{model_name}:onnx-{'int8' if int8 else 'fp32'}"
+        logger.info(f"ONNX embeddings ready ({'int8' if int8 else 'fp32'}, threads={threads or 'default'})")
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), self.batch_size):
+            encoded = self.tokenizer(texts[start:start + self.batch_size], padding=True, truncation=True,
+                                     max_length=MAX_SEQ_LENGTH, return_tensors="np")
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            hidden = self.session.run(None, feeds)[0]
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        return np.concatenate(outputs) if outputs else np.empty((0, 384), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
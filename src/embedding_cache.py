@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import logging
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.f32"
+INFO_FILE = "info.json"
+KEY_BYTES = 32
+
+
+def embedding_key(model_name: str, text: str) -> bytes:
+    """Content address of one chunk embedding: SHA-256 of model name and text"""
+    return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+    """
+    Append-only on-disk embedding cache. Vectors are raw float32 rows read
+    through a memory map; keys are fixed-size digests in a parallel file,
+    so row i of one file belongs to key i of the other.
+    """
+
+    def __init__(self, directory: str, dimension: int):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dimension = dimension
+        self._keys_path = os.path.join(directory, KEYS_FILE)
+        self._vectors_path = os.path.join(directory, VECTORS_FILE)
+
+        info_path = os.path.join(directory, INFO_FILE)
+        if os.path.exists(info_path):
+            with open(info_path) as f:
+                cached_dimension = json.load(f)["dimension"]
+            if cached_dimension != dimension:
+                raise ValueError(f"Embedding cache at {directory} holds {cached_dimension}-dim vectors, not {dimension}")
+        else:
+            with open(info_path, 'w') as f:
+                json.dump({"dimension": dimension}, f)
+
+        keys = open(self._keys_path, 'rb').read() if os.path.exists(self._keys_path) else b""
+        vector_rows = (os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0) \
+            // (4 * dimension)
+        # An interrupted append can leave one file longer than the other; trust the shorter one
+        rows = min(len(keys) // KEY_BYTES, vector_rows)
+        self._truncate(rows)
+        self._rows = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(rows)}
+        self._vectors = None
+        logger.info(f"Embedding cache at {directory}: {rows} vectors")
+
+    def _truncate(self, rows: int):
+        for path, row_bytes in ((self._keys_path, KEY_BYTES), (self._vectors_path, 4 * self.dimension)):
+            with open(path, 'ab') as f:
+                f.truncate(rows * row_bytes)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _vector_map(self) -> np.ndarray:
+        if self._vectors is None or len(self._vectors) != len(self._rows):
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r',
+                                      shape=(len(self._rows), self.dimension)) if self._rows else \
+                np.empty((0, self.dimension), dtype=np.float32)
+        return self._vectors
+
+    def lookup(self, keys: List[bytes]) -> np.ndarray:
+        """Row index for each key, -1 for misses"""
+        rows = self._rows
+        return np.fromiter((rows.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+
+    def get(self, rows: np.ndarray) -> np.ndarray:
+        return np.asarray(self._vector_map()[rows], dtype=np.float32)
+
+    def append(self, keys: List[bytes], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        # Vectors first: a key is only ever written after the row it points to
+        with open(self._vectors_path, 'ab') as f:
+            f.write(vectors.tobytes())
+        with open(self._keys_path, 'ab') as f:
+            f.write(b"".join(keys))
+        start = len(self._rows)
+        for i, key in enumerate(keys):
+            self._rows[key] = start + i
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated chunk texts from an EmbeddingCache"""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str = None, batch_size: int = 512):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name or getattr(embeddings, 'model_name', type(embeddings).__name__)
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as one (n, dim) array, computing only cache misses"""
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        rows = self.cache.lookup(keys)
+
+        # Deduplicate misses so repeated texts in one run are embedded once
+        missing = {}
+        for i in np.flatnonzero(rows < 0).tolist():
+            missing.setdefault(keys[i], i)
+        self.hits += len(texts) - int((rows < 0).sum())
+        self.misses += len(missing)
+
+        miss_keys = list(missing)
+        for start in range(0, len(miss_keys), self.batch_size):
+            batch_keys = miss_keys[start:start + self.batch_size]
+            vectors = self.embeddings.embed_documents([texts[missing[key]] for key in batch_keys])
+            self.cache.append(batch_keys, np.asarray(vectors, dtype=np.float32))
+
+        if miss_keys:
+            rows = self.cache.lookup(keys)
+        logger.info(f"Embedding cache: {self.hits} hits, {self.misses} computed")
+        return self.cache.get(rows)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
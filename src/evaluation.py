@@ -0,0 +1,60 @@
+import os
+import json
+import math
+from typing import Dict, Any, List, Optional, Sequence
+
+
+def load_labelled_queries(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a JSONL query set. Each line looks like
+    {"query": "...", "relevant": [{"source": "Medical_book.pdf", "page": 41}, ...]};
+    "page" may be omitted to accept any page of that source.
+    """
+    queries = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                queries.append({"query": record["query"], "relevant": record.get("relevant", [])})
+    return queries
+
+
+def matching_label(source: str, page: Optional[int], labels: Sequence[Dict[str, Any]]) -> Optional[int]:
+    """Index of the first label a retrieved chunk satisfies, or None"""
+    name = os.path.basename(source or "")
+    for i, label in enumerate(labels):
+        if os.path.basename(label["source"]) == name and label.get("page") in (None, page):
+            return i
+    return None
+
+
+def score_ranking(hits: List[Optional[int]], label_count: int, k: int) -> Dict[str, float]:
+    """
+    Recall@k, reciprocal rank and nDCG@k for one query. hits[i] is the label
+    matched by the chunk at rank i (or None); each label is credited once.
+    """
+    seen = set()
+    dcg = 0.0
+    first_rank = None
+    for rank, label in enumerate(hits[:k]):
+        if label is None or label in seen:
+            continue
+        seen.add(label)
+        dcg += 1.0 / math.log2(rank + 2)
+        if first_rank is None:
+            first_rank = rank + 1
+
+    ideal = sum(1.0 / math.log2(rank + 2) for rank in range(min(label_count, k)))
+    return {
+        "recall": len(seen) / label_count if label_count else 0.0,
+        "mrr": 1.0 / first_rank if first_rank else 0.0,
+        "ndcg": dcg / ideal if ideal else 0.0,
+    }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
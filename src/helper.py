@@ -1,6 +1,9 @@
-from typing import List
+from typing import Iterable, Iterator, List
 from langchain.schema import Document
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+from src.parse_cache import iter_pdf_pages
+from src.text_splitter import split_documents
+from src.embedding_backend import OnnxMiniLMEmbeddings, configure_torch_threads, MODEL_NAME
+from config import Config
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 import logging
@@ -8,43 +11,71 @@ import logging
 logger = logging.getLogger(__name__)
 
 #Extract Data From the PDF File
-def load_pdf_file(data):
-    """Load PDF files from directory"""
+def load_pdf_file(data, cache_dir: str = Config.PARSE_CACHE_DIR, lazy: bool = False):
+    """
+    Load PDF files from directory, streaming unchanged files from the parse
+    cache. By default the pages are returned as a list, for callers that go
+    over them more than once (evaluate_retrieval splits the same pages at
+    several chunk sizes). lazy=True returns a generator instead, so a
+    single pass such as ingestion never holds every page in memory; parse
+    errors then surface while iterating.
+    """
+    if lazy:
+        return _iter_pdf_file(data, cache_dir)
     try:
-        loader = DirectoryLoader(data,
-                                glob="*.pdf",
-                                loader_cls=PyPDFLoader)
-
-        documents = loader.load()
+        documents = list(iter_pdf_pages(data, cache_dir))
         logger.info(f"Loaded {len(documents)} documents from {data}")
         return documents
     except Exception as e:
         logger.error(f"❌ Error loading PDF files: {e}")
         return []
 
+def _iter_pdf_file(data, cache_dir: str) -> Iterator[Document]:
+    count = 0
+    for document in iter_pdf_pages(data, cache_dir):
+        count += 1
+        yield document
+    logger.info(f"Loaded {count} documents from {data}")
+
+def _minimal_metadata(doc: Document) -> Document:
+    doc.metadata = {"source": doc.metadata.get("source"), "page": doc.metadata.get("page")}
+    return doc
+
 def filter_to_minimal_docs(docs: List[Document]) -> List[Document]:
     """
-    Given a list of Document objects, return a new list of Document objects
-    containing only 'source' in metadata and the original page_content.
+    Reduce each Document's metadata to only 'source' and 'page', in place.
+    The page_content is shared rather than copied into new Document objects,
+    so large corpora are not duplicated in memory during ingestion.
     """
-    minimal_docs: List[Document] = []
     for doc in docs:
-        src = doc.metadata.get("source")
-        minimal_docs.append(
-            Document(
-                page_content=doc.page_content,
-                metadata={"source": src}
-            )
-        )
-    logger.info(f"Filtered {len(minimal_docs)} documents")
-    return minimal_docs
+        _minimal_metadata(doc)
+    logger.info(f"Filtered {len(docs)} documents")
+    return docs
+
+def iter_minimal_docs(docs: Iterable[Document]) -> Iterator[Document]:
+    """filter_to_minimal_docs for a stream of pages, one page at a time"""
+    return map(_minimal_metadata, docs)
 
 #Split the Data into Text Chunks
-def text_split(extracted_data):
-    """Split documents into chunks"""
+def text_split(extracted_data, chunk_size: int = None, chunk_overlap: int = None,
+               splitter: str = Config.TEXT_SPLITTER):
+    """
+    Split documents into chunks. The 'sentence' splitter measures chunk_size
+    and chunk_overlap in tokens and cuts on sentence and heading boundaries,
+    consuming an iterator of pages as it goes; 'recursive' is LangChain's
+    character splitter (500/20 characters), which collects every page first.
+    """
     try:
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=20)
-        text_chunks = text_splitter.split_documents(extracted_data)
+        if splitter == 'sentence':
+            text_chunks = split_documents(extracted_data,
+                                          max_tokens=chunk_size or Config.CHUNK_MAX_TOKENS,
+                                          overlap_tokens=Config.CHUNK_OVERLAP_TOKENS if chunk_overlap is None
+                                          else chunk_overlap,
+                                          workers=Config.SPLIT_WORKERS)
+        else:
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size or 500,
+                                                           chunk_overlap=20 if chunk_overlap is None else chunk_overlap)
+            text_chunks = text_splitter.split_documents(extracted_data)
         logger.info(f"Created {len(text_chunks)} text chunks")
         return text_chunks
     except Exception as e:
@@ -52,10 +83,19 @@ def text_split(extracted_data):
         return []
 
 #Download the Embeddings from HuggingFace 
-def download_hugging_face_embeddings():
-    """Download and initialize HuggingFace embeddings"""
+def download_hugging_face_embeddings(backend: str = Config.EMBEDDING_BACKEND):
+    """Initialize the configured embedding backend ('torch' or 'onnx') for all-MiniLM-L6-v2"""
     try:
-        embeddings = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2')  #this model returns 384 dimensions
+        if backend == 'onnx':
+            embeddings = OnnxMiniLMEmbeddings(Config.ONNX_MODEL_DIR, int8=Config.EMBEDDING_ONNX_INT8,
+                                              threads=Config.EMBEDDING_THREADS,
+                                              batch_size=Config.EMBEDDING_BATCH_SIZE)
+            logger.info("ONNX Runtime embeddings initialized successfully")
+            return embeddings
+
+        configure_torch_threads(Config.EMBEDDING_THREADS)
+        embeddings = HuggingFaceEmbeddings(model_name=MODEL_NAME,  #this model returns 384 dimensions
+                                           encode_kwargs={"batch_size": Config.EMBEDDING_BATCH_SIZE})
         logger.info("HuggingFace embeddings initialized successfully")
         return embeddings
     except Exception as e:
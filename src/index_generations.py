@@ -0,0 +1,195 @@
+import os
+import time
+import atexit
+import shutil
+import logging
+import threading
+from typing import List, Optional, Set, Tuple
+import numpy as np
+from src.docstore import ChunkTextStore
+from src.quantization import QuantizedVectorIndex
+from src.sharding import ShardedSearcher
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+GENERATIONS_DIR = "generations"
+SERVING_DIR = "serving"  # one file per worker process naming the generation it serves
+
+_marked_roots: Set[str] = set()
+
+
+def new_generation(root: str) -> Tuple[str, str]:
+    """Create an empty generation directory under root; returns (name, path)"""
+    name = time.strftime('%Y%m%d-%H%M%S') + f"-{time.time_ns() % 1_000_000_000:09d}"
+    path = os.path.join(root, GENERATIONS_DIR, name)
+    os.makedirs(path)
+    return name, path
+
+
+def publish_generation(root: str, name: str):
+    """Atomically point CURRENT at a fully written generation"""
+    temporary = os.path.join(root, CURRENT_FILE + ".partial")
+    with open(temporary, 'w') as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, os.path.join(root, CURRENT_FILE))
+    logger.info(f"Published index generation {name}")
+
+
+def current_generation(root: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    (name, path) of the published generation. An index written before
+    generations existed lives directly in root and has the empty name,
+    which is also Pinecone's default namespace.
+    """
+    if not root:
+        return "", None
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return "", root
+    return name, os.path.join(root, GENERATIONS_DIR, name)
+
+
+def mark_serving(root: Optional[str], name: str):
+    """Record that this process serves generation `name`, so pruning leaves it alone"""
+    if not root or not name:
+        return
+    directory = os.path.join(root, SERVING_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, str(os.getpid()))
+    temporary = f"{path}.partial"
+    with open(temporary, 'w') as f:
+        f.write(name)
+    os.replace(temporary, path)
+    if root not in _marked_roots:
+        _marked_roots.add(root)
+        atexit.register(_unmark_serving, path)
+
+
+def _unmark_serving(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def serving_generations(root: str) -> Set[str]:
+    """
+    Generations some live worker on this host still serves. Markers left by
+    workers that died without cleaning up are removed. LOCAL_INDEX_DIR is
+    per host, so process ids are checked on this host.
+    """
+    directory = os.path.join(root, SERVING_DIR)
+    if not os.path.isdir(directory):
+        return set()
+    names = set()
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if not entry.isdigit():
+            continue
+        if not _process_alive(int(entry)):
+            _unmark_serving(path)
+            continue
+        try:
+            with open(path) as f:
+                names.add(f.read().strip())
+        except FileNotFoundError:
+            pass
+    return names
+
+
+def prune_generations(root: str, keep: int = 2) -> List[str]:
+    """
+    Delete all but the newest `keep` generations. The current one always
+    stays, and so does any generation a live worker still serves: with the
+    reload watcher off (INDEX_RELOAD_INTERVAL=0) workers can lag any number
+    of builds behind. Returns the names removed.
+    """
+    directory = os.path.join(root, GENERATIONS_DIR)
+    if not os.path.isdir(directory):
+        return []
+    current, _ = current_generation(root)
+    names = sorted(os.listdir(directory), reverse=True)
+    kept = set(names[:keep]) | {current} | serving_generations(root)
+    removed = [name for name in names if name not in kept]
+    for name in removed:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    if removed:
+        logger.info(f"Pruned index generations: {removed}")
+    return removed
+
+
+class IndexGeneration:
+    """
+    One loaded index generation: docstore, local vectors and searcher.
+    The owner holds one reference; each in-flight query holds another.
+    Memory maps, shared memory and shard workers are released when the
+    last reference goes, so a retired generation outlives its queries.
+    """
+
+    def __init__(self, name: str, path: Optional[str], vector_backend: str = 'pinecone',
+                 search_shards: int = 1, shard_min_vectors: int = 200_000):
+        self.name = name
+        self.path = path
+        self.docstore = None
+        self.local_index = None
+        self.searcher = None
+        self._refs = 1
+        self._lock = threading.Lock()
+
+        if ChunkTextStore.exists(path):
+            self.docstore = ChunkTextStore(path)
+            if vector_backend == 'local' and QuantizedVectorIndex.exists(path):
+                # Quantized in-process search; no Pinecone round-trip at all
+                self.local_index = QuantizedVectorIndex(path)
+                self.searcher = ShardedSearcher(self.local_index, search_shards, shard_min_vectors)
+
+    @property
+    def namespace(self) -> str:
+        """Pinecone namespace holding this generation's vectors"""
+        return self.name
+
+    def warm(self):
+        """Fault in the pages a first query would touch, before any query sees this generation"""
+        if self.searcher is not None and len(self.local_index):
+            dimension = self.local_index.vectors.shape[1]
+            self.searcher.search(np.full(dimension, dimension ** -0.5, dtype=np.float32), k=1)
+        if self.docstore is not None and len(self.docstore):
+            self.docstore.get_text(0)
+
+    def acquire(self) -> 'IndexGeneration':
+        with self._lock:
+            if self._refs == 0:
+                raise RuntimeError(f"Index generation {self.name or '(legacy)'} already released")
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            closing = self._refs == 0
+        if closing:
+            self._close()
+
+    def _close(self):
+        if self.searcher is not None:
+            self.searcher.close()
+        if self.local_index is not None:
+            self.local_index.close()
+        if self.docstore is not None:
+            self.docstore.close()
+        logger.info(f"Released index generation {self.name or '(legacy)'}")
@@ -1,4 +1,5 @@
 import os
+import time
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
@@ -7,11 +8,54 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class StandInLLM:
+    """
+    Provider stand-in for load replay: no network and no cost, with a fixed
+    time to first token, per-token delay and answer length, so latency
+    differences between two builds come from our code rather than the provider.
+    """
+
+    class Chunk:
+        def __init__(self, content: str):
+            self.content = content
+
+    def __init__(self, first_token_ms: float = 300, token_ms: float = 20, tokens: int = 120):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.tokens = tokens
+
+    def stream(self, prompt):
+        time.sleep(self.first_token_ms / 1000)
+        for i in range(self.tokens):
+            if i:
+                time.sleep(self.token_ms / 1000)
+            yield self.Chunk(f"token{i} ")
+
+    def invoke(self, prompt):
+        return self.Chunk("".join(chunk.content for chunk in self.stream(prompt)))
+
+
+LLM_API_KEYS = ["GOOGLE_API_KEY", "OPENAI_API_KEY", "ANTHROPIC_API_KEY"]
+
+
+def llm_configured() -> bool:
+    """True when a real (or stand-in) provider is available, not just the dummy fallback"""
+    return os.environ.get("MEDIBOT_LLM_PROVIDER") == "standin" or any(os.environ.get(key) for key in LLM_API_KEYS)
+
+
 def get_llm_cascade():
     """
     Returns a list of LLM instances in the desired fallback order.
     Checks for API keys and only includes available models.
     """
+    if os.environ.get("MEDIBOT_LLM_PROVIDER") == "standin":
+        logger.info("Using stand-in LLM provider (replay mode)")
+        return [StandInLLM(
+            first_token_ms=float(os.environ.get("MEDIBOT_STANDIN_FIRST_TOKEN_MS", 300)),
+            token_ms=float(os.environ.get("MEDIBOT_STANDIN_TOKEN_MS", 20)),
+            tokens=int(os.environ.get("MEDIBOT_STANDIN_TOKENS", 120)),
+        )]
+
     llm_providers = []
 
     # 1. Gemini (Primary)
@@ -1,22 +1,88 @@
-from typing import List, Dict, Any, Iterator
+from typing import List, Dict, Any, Iterator, Optional
 import numpy as np
 from langchain_pinecone import PineconeVectorStore
-from langchain.schema import Document
+from pinecone import Pinecone
 from langchain.prompts import ChatPromptTemplate
+from src.chunks import MedicalChunk
+from src.index_generations import IndexGeneration, current_generation, mark_serving
+from src.security import medical_disclaimer_required
+from src.stream_filter import StreamingOutputFilter, FLAG_MESSAGES
+from src.prompt import get_specialized_medical_prompt
+from src.llm_handler import get_llm_cascade
+from src.timing import StageTimer
+from src.query_expansion import QueryExpander, reciprocal_rank_fusion
+from src.source_metadata import cached_source_info
+from src.prefetch import normalize_query
+import os
 import re
 import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for the concurrent stages of process_medical_query
+stage_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="rag-stage")
+
+# Leaf pool for the remote-index fan-out in vector_search_many. Stage tasks wait on
+# these searches, so they must not share stage_executor: with every stage thread
+# blocked on a nested search, nothing would be left to run it
+search_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="rag-search")
+
+# Bounded pool for batch answer generation, so one large batch cannot starve interactive requests
+batch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-batch")
+# Batch retrieval fan-out, kept off search_executor so a batch of 50 questions cannot queue
+# hundreds of remote searches ahead of interactive /get retrieval
+batch_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-batch-search")
+
 
 class AdvancedMedicalRAG:
     """Advanced RAG system specifically designed for medical applications"""
 
-    def __init__(self, embeddings, index_name: str, use_hybrid_search: bool = True, medical_reranking: bool = True):
+    def __init__(self, embeddings, index_name: str, use_hybrid_search: bool = True, medical_reranking: bool = True,
+                 docstore_dir: Optional[str] = None, vector_backend: str = 'pinecone', rescore_factor: int = 4,
+                 search_shards: int = 1, shard_min_vectors: int = 200_000, hybrid_weight: Optional[float] = None,
+                 query_expansion: bool = True, credibility_weight: float = 0.0):
         self.embeddings = embeddings
         self.index_name = index_name
+        self.docstore_dir = docstore_dir
+        self.vector_backend = vector_backend
+        self.search_shards = search_shards
+        self.shard_min_vectors = shard_min_vectors
         self.use_hybrid_search = use_hybrid_search
         self.medical_reranking = medical_reranking
+        self.rescore_factor = rescore_factor
+        # When set, reranking blends vector score with term relevance instead of using term relevance alone
+        self.hybrid_weight = hybrid_weight
+        self.query_expander = QueryExpander() if query_expansion else None
+        # Reranking bonus per unit of precomputed source credibility (0 disables it)
+        self.credibility_weight = credibility_weight
+        self._llm = None
+        self._llm_lock = threading.Lock()
+
+        # Medical query classification patterns
+        self.medical_patterns = {
+            'symptoms': [r'pain', r'ache', r'hurt', r'symptom', r'feel', r'experiencing'],
+            'diagnosis': [r'diagnose', r'what is', r'condition', r'disease', r'disorder'],
+            'treatment': [r'treat', r'cure', r'medicine', r'medication', r'therapy'],
+            'emergency': [r'emergency', r'urgent', r'serious', r'dangerous', r'immediate'],
+            'prevention': [r'prevent', r'avoid', r'protect', r'vaccine', r'screening'],
+            'general': [r'health', r'medical', r'doctor', r'hospital', r'wellness']
+        }
+
+        # Local chunk text store: when present the index returns ids and scores only.
+        # It lives in a swappable generation so a rebuilt index can be loaded without a restart.
+        self.index = None
+        self.vector_store = None
+        self._generation_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._generation = self._load_generation()
+        mark_serving(self.docstore_dir, self._generation.name)
+        if self.searcher is not None:
+            return
+        if self.docstore is not None:
+            self.index = Pinecone(api_key=os.environ.get('PINECONE_API_KEY')).Index(index_name)
 
         # Initialize vector store
         try:
@@ -29,15 +95,80 @@ class AdvancedMedicalRAG:
             logger.error(f"❌ Failed to connect to Pinecone: {e}")
             raise e
 
-        # Medical query classification patterns
-        self.medical_patterns = {
-            'symptoms': [r'pain', r'ache', r'hurt', r'symptom', r'feel', r'experiencing'],
-            'diagnosis': [r'diagnose', r'what is', r'condition', r'disease', r'disorder'],
-            'treatment': [r'treat', r'cure', r'medicine', r'medication', r'therapy'],
-            'emergency': [r'emergency', r'urgent', r'serious', r'dangerous', r'immediate'],
-            'prevention': [r'prevent', r'avoid', r'protect', r'vaccine', r'screening'],
-            'general': [r'health', r'medical', r'doctor', r'hospital', r'wellness']
-        }
+    @property
+    def docstore(self):
+        return self._generation.docstore
+
+    @property
+    def local_index(self):
+        return self._generation.local_index
+
+    @property
+    def searcher(self):
+        return self._generation.searcher
+
+    @property
+    def generation(self) -> str:
+        return self._generation.name
+
+    def _load_generation(self) -> IndexGeneration:
+        name, path = current_generation(self.docstore_dir)
+        generation = IndexGeneration(name, path, self.vector_backend, self.search_shards, self.shard_min_vectors)
+        generation.warm()
+        return generation
+
+    def _pin_generation(self) -> IndexGeneration:
+        with self._generation_lock:
+            return self._generation.acquire()
+
+    @contextmanager
+    def use_generation(self):
+        """Pin the current index generation so a concurrent reload cannot release it mid-query"""
+        generation = self._pin_generation()
+        try:
+            yield generation
+        finally:
+            generation.release()
+
+    def reload_index(self) -> bool:
+        """
+        Load the published index generation alongside the serving one and
+        switch to it atomically. In-flight queries finish on the old
+        generation, which is released when the last of them completes.
+        Reloads are serialized, so the watcher and /admin/reload-index
+        cannot load the same generation twice. Returns False when the
+        published generation is already serving.
+        """
+        with self._reload_lock:
+            name, _ = current_generation(self.docstore_dir)
+            if name == self._generation.name:
+                return False
+
+            generation = self._load_generation()
+            if (generation.docstore is None) != (self.docstore is None) or \
+                    (generation.searcher is None) != (self.searcher is None):
+                generation.release()
+                raise ValueError(f"Index generation {name} does not match the serving index layout")
+
+            with self._generation_lock:
+                previous, self._generation = self._generation, generation
+            mark_serving(self.docstore_dir, generation.name)
+        previous.release()
+        logger.info(f"🔄 Switched to index generation {name} ({len(generation.docstore or [])} chunks)")
+        return True
+
+    def snapshot_retrieval(self, docs: List[MedicalChunk], generation: IndexGeneration) -> Dict[str, Any]:
+        """JSON-safe retrieval results, for reuse by another worker"""
+        return {"generation": generation.name, "chunks": [doc.to_record() for doc in docs]}
+
+    def restore_retrieval(self, snapshot: Dict[str, Any], generation: IndexGeneration) -> Optional[List[MedicalChunk]]:
+        """Chunks from snapshot_retrieval, or None if they were retrieved from another index generation"""
+        if snapshot.get("generation") != generation.name:
+            return None
+        records = snapshot.get("chunks", [])
+        if generation.docstore is None and any(len(record) == 2 for record in records):
+            return None
+        return [MedicalChunk.from_record(record, generation.docstore) for record in records]
 
     def classify_medical_query(self, query: str) -> str:
         """Classify the type of medical query"""
@@ -54,11 +185,20 @@ class AdvancedMedicalRAG:
 
         return 'general'
 
-    def hybrid_search(self, query: str, k: int = 8) -> List[Document]:
+    def hybrid_search(self, query: str, k: int = 8,
+                      generation: Optional[IndexGeneration] = None) -> List[MedicalChunk]:
         """Advanced hybrid search combining vector and keyword search"""
+        if generation is None:
+            with self.use_generation() as generation:
+                return self.hybrid_search(query, k, generation)
         try:
-            # Vector similarity search
-            vector_docs = self.vector_store.similarity_search(query, k=k)
+            # Vector similarity search, over clinical rewrites of lay terms when there are any
+            variants = self.query_expander.expand(query) if self.query_expander else [query]
+            if len(variants) == 1:
+                vector_docs = self.vector_search(query, k=k, generation=generation)
+            else:
+                vector_docs = reciprocal_rank_fusion(
+                    self.vector_search_many(variants, k=k, generation=generation), key=self._chunk_key, k=k)
 
             # Enhanced with medical term weighting
             medical_terms = self.extract_medical_terms(query)
@@ -73,6 +213,99 @@ class AdvancedMedicalRAG:
             logger.error(f"Hybrid search error: {e}")
             return []
 
+    def batch_search(self, queries: List[str], k: int = 8,
+                     generation: Optional[IndexGeneration] = None) -> List[List[MedicalChunk]]:
+        """hybrid_search for many queries: one embedding call and one vectorized search over all their variants"""
+        if generation is None:
+            with self.use_generation() as generation:
+                return self.batch_search(queries, k, generation)
+
+        variants = [self.query_expander.expand(query) if self.query_expander else [query] for query in queries]
+        flat = [variant for query_variants in variants for variant in query_variants]
+        results = self.vector_search_many(flat, k=k, generation=generation,
+                                          executor=batch_search_executor) if flat else []
+
+        # Questions in a batch often retrieve the same chunks: keep one record per chunk id so
+        # its text is read once and its rerank features are computed once for the whole batch
+        shared: Dict[Any, MedicalChunk] = {}
+        features: Dict[Any, tuple] = {}
+        results = [[shared.setdefault(self._chunk_key(chunk), chunk) for chunk in ranking] for ranking in results]
+
+        batch_docs = []
+        start = 0
+        for query, query_variants in zip(queries, variants):
+            rankings = results[start:start + len(query_variants)]
+            start += len(query_variants)
+            docs = rankings[0] if len(rankings) == 1 else reciprocal_rank_fusion(rankings, key=self._chunk_key, k=k)
+            medical_terms = self.extract_medical_terms(query)
+            if self.medical_reranking and medical_terms:
+                docs = self.rerank_by_medical_relevance(docs, medical_terms, features)
+            batch_docs.append(docs)
+        return batch_docs
+
+    def vector_search(self, query: str, k: int = 8,
+                      generation: Optional[IndexGeneration] = None) -> List[MedicalChunk]:
+        """Vector search returning compact chunk records"""
+        if generation is None:
+            with self.use_generation() as generation:
+                return self.vector_search(query, k, generation)
+        docstore = generation.docstore
+
+        if generation.searcher is not None:
+            ids, scores = generation.searcher.search(self.embeddings.embed_query(query), k=k,
+                                                     rescore_factor=self.rescore_factor)
+            return [MedicalChunk.from_store(docstore, i, score) for i, score in zip(ids.tolist(), scores.tolist())]
+
+        if docstore is not None:
+            # Ids and scores only; text is fetched lazily from the local docstore
+            response = self.index.query(vector=self.embeddings.embed_query(query), top_k=k, include_metadata=False,
+                                        namespace=generation.namespace)
+            return [
+                MedicalChunk.from_store(docstore, match['id'], match['score'])
+                for match in response['matches']
+                if match['id'] in docstore
+            ]
+
+        # Text stored in index metadata: convert at the LangChain boundary
+        return [
+            MedicalChunk.from_document(doc, score)
+            for doc, score in self.vector_store.similarity_search_with_score(query, k=k)
+        ]
+
+    def vector_search_many(self, queries: List[str], k: int = 8,
+                           generation: Optional[IndexGeneration] = None,
+                           executor: Optional[ThreadPoolExecutor] = None) -> List[List[MedicalChunk]]:
+        """Vector search for several queries with one batched embedding call"""
+        if generation is None:
+            with self.use_generation() as generation:
+                return self.vector_search_many(queries, k, generation, executor)
+        docstore = generation.docstore
+        vectors = self.embeddings.embed_documents(queries)
+
+        if generation.searcher is not None:
+            return [
+                [MedicalChunk.from_store(docstore, i, score) for i, score in zip(ids.tolist(), scores.tolist())]
+                for ids, scores in generation.searcher.search_batch(vectors, k=k, rescore_factor=self.rescore_factor)
+            ]
+
+        # Remote index has no batch query; issue the queries concurrently so they cost one round-trip
+        if docstore is not None:
+            def search(vector):
+                response = self.index.query(vector=vector, top_k=k, include_metadata=False,
+                                            namespace=generation.namespace)
+                return [
+                    MedicalChunk.from_store(docstore, match['id'], match['score'])
+                    for match in response['matches']
+                    if match['id'] in docstore
+                ]
+        else:
+            def search(vector):
+                return [
+                    MedicalChunk.from_document(doc, score)
+                    for doc, score in self.vector_store.similarity_search_by_vector_with_score(vector, k=k)
+                ]
+        return list((executor or search_executor).map(search, vectors))
+
     def extract_medical_terms(self, text: str) -> List[str]:
         """Extract medical terminology from text"""
         # Common medical prefixes/suffixes
@@ -91,138 +324,255 @@ class AdvancedMedicalRAG:
 
         return list(set(terms))
 
-    def rerank_by_medical_relevance(self, docs: List[Document], medical_terms: List[str]) -> List[Document]:
-        """Re-rank documents based on medical term relevance"""
+    def rerank_by_medical_relevance(self, docs: List[MedicalChunk], medical_terms: List[str],
+                                    features: Optional[Dict[Any, tuple]] = None) -> List[MedicalChunk]:
+        """
+        Re-rank chunks based on medical term relevance. features caches the
+        per-chunk part of the score by chunk key, for callers reranking the
+        same chunks for several queries.
+        """
         if not medical_terms:
             return docs
 
-        scored_docs = []
+        scores = []
         for doc in docs:
-            content_lower = doc.page_content.lower()
+            key = self._chunk_key(doc) if features is not None else None
+            cached = features.get(key) if features is not None else None
+            if cached is None:
+                text = doc.text
+                # Lowercased text, document length factor and credibility bonus depend only on the chunk
+                cached = (text.lower(), len(text.split()) * 0.1,
+                          self.credibility_weight * doc.source_info["credibility"])
+                if features is not None:
+                    features[key] = cached
+            content_lower, length_score, credibility_score = cached
 
             # Calculate relevance score
             term_matches = sum(1 for term in medical_terms if term in content_lower)
-            base_score = len(doc.page_content.split())  # Document length factor
-            relevance_score = (term_matches * 10) + (base_score * 0.1)
+            scores.append((term_matches * 10) + length_score + credibility_score)
 
-            scored_docs.append((doc, relevance_score))
+        if self.hybrid_weight is not None and scores:
+            top = max(scores) or 1.0
+            scores = [self.hybrid_weight * doc.score + (1 - self.hybrid_weight) * score / top
+                      for doc, score in zip(docs, scores)]
 
-        # Sort by relevance score
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
-        return [doc for doc, _ in scored_docs]
+        # Sort by relevance score without building intermediate tuples of documents
+        order = sorted(range(len(docs)), key=scores.__getitem__, reverse=True)
+        return [docs[i] for i in order]
 
-    def generate_medical_context(self, docs: List[Document], query_type: str) -> str:
+    def generate_medical_context(self, docs: List[MedicalChunk], query_type: str) -> str:
         """Generate enhanced medical context with source attribution"""
         if not docs:
             return "No relevant medical information found in the knowledge base."
 
         context_parts = []
         for i, doc in enumerate(docs[:5], 1):
-            source = doc.metadata.get('source', 'Unknown Source')
-            content = doc.page_content.strip()
+            source = doc.source
+            # Text is only materialized here, when the prompt is built
+            content = doc.text.strip()
 
             # Add source attribution
             context_parts.append(f"[Source {i}: {source}]\n{content}\n")
 
         return "\n".join(context_parts)
 
-    def process_medical_query(self, query: str, query_type: str, conversation_history: List[Dict], session_id: str) -> \
-    Iterator[Dict[str, Any]]:
-        """Main processing pipeline for medical queries"""
+    def get_llm(self):
+        """Primary LLM from the cascade, built once and reused across queries"""
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = get_llm_cascade()[0]
+        return self._llm
+
+    def process_medical_query(self, query: str, query_type: str, conversation_history, session_id: str,
+                              docs: Optional[List[MedicalChunk]] = None,
+                              timer: Optional[StageTimer] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Main processing pipeline for medical queries.
+
+        Classification and the disclaimer are emitted immediately, while
+        retrieval and LLM warm-up run concurrently on the stage executor.
+        conversation_history may be a list or a Future from the same
+        executor; it is never waited on here. Pass docs to reuse prefetched
+        retrieval and timer to collect stage timings.
+        """
+        timer = timer or StageTimer()
+        # Chunk text is read lazily, so the generation stays pinned until the answer is done
+        generation = self._pin_generation()
         try:
-            # Search for relevant documents
-            docs = self.hybrid_search(query, k=8)
+            yield {"type": "classification", "content": query_type}
+            timer.mark("classified")
+
+            # Prefetched before an index reload: those chunks point into the retired generation
+            if docs is not None and not all(doc.belongs_to(generation.docstore) for doc in docs):
+                docs = None
+
+            # Start retrieval and provider warm-up before anything else blocks
+            if docs is None:
+                docs_future = stage_executor.submit(self._timed_stage, timer, "retrieval", self.hybrid_search,
+                                                    query, 8, generation)
+            llm_future = stage_executor.submit(self._timed_stage, timer, "llm_warmup", self.get_llm)
 
             # Generate medical disclaimer if needed
-            from src.security import medical_disclaimer_required
             if medical_disclaimer_required(query_type):
                 yield {
                     "type": "medical_warning",
                     "content": "⚠️ This information is for educational purposes only. Always consult with a healthcare professional for medical advice."
                 }
 
-            # Generate context
-            context = self.generate_medical_context(docs, query_type)
+            if docs is None:
+                docs = docs_future.result()
 
-            # Create specialized prompt based on query type
-            from src.prompt import get_specialized_medical_prompt
-            prompt = get_specialized_medical_prompt(query_type, context, query)
+            # Generate context and a specialized prompt based on query type
+            with timer.stage("context"):
+                context = self.generate_medical_context(docs, query_type)
+                prompt = get_specialized_medical_prompt(query_type, context, query)
 
-            # Get LLM and generate response
-            from src.llm_handler import get_llm_cascade
-            llm = get_llm_cascade()[0]
+            llm = llm_future.result()
 
-            # Stream the response
+            # Stream the response through the output filter: PII is redacted and
+            # risky phrases are flagged chunk by chunk, without buffering the answer
             response_text = ""
+            output_filter = StreamingOutputFilter()
             try:
-                if hasattr(llm, 'stream'):
-                    # Streaming response
-                    for token in llm.stream(prompt):
-                        if hasattr(token, 'content'):
-                            content = token.content
-                            response_text += content
+                with timer.stage("generation"):
+                    if hasattr(llm, 'stream'):
+                        # Streaming response
+                        for token in llm.stream(prompt):
+                            if hasattr(token, 'content'):
+                                content = token.content
+                                response_text += content
+                                content, flags = output_filter.feed(content)
+                                yield from self._safety_flag_events(flags)
+                                if content:
+                                    timer.mark("first_token")
+                                    yield {
+                                        "type": "answer_chunk",
+                                        "content": content
+                                    }
+                        content, flags = output_filter.flush()
+                        yield from self._safety_flag_events(flags)
+                        if content:
+                            timer.mark("first_token")
                             yield {
                                 "type": "answer_chunk",
                                 "content": content
                             }
-                else:
-                    # Non-streaming response
-                    response = llm.invoke(prompt)
-                    content = response.content if hasattr(response, 'content') else str(response)
-                    response_text = content
-                    yield {
-                        "type": "answer_chunk",
-                        "content": content
-                    }
+                    else:
+                        # Non-streaming response
+                        response = llm.invoke(prompt)
+                        content = response.content if hasattr(response, 'content') else str(response)
+                        response_text = content
+                        content, flags = output_filter.scan(content)
+                        yield from self._safety_flag_events(flags)
+                        timer.mark("first_token")
+                        yield {
+                            "type": "answer_chunk",
+                            "content": content
+                        }
             except Exception as e:
                 logger.error(f"LLM streaming error: {e}")
-                fallback_response = f"I understand you're asking about {query_type}-related information. Based on the available medical literature, I can provide some general guidance, but please consult with a healthcare professional for personalized advice."
                 yield {
                     "type": "answer_chunk",
-                    "content": fallback_response
+                    "content": self._fallback_answer(query_type)
                 }
 
             # Return sources
             if docs:
-                sources = [doc.metadata.get('source', 'Unknown') for doc in docs]
+                # Keep retrieval order while dropping duplicate sources; display name,
+                # credibility and icon come precomputed from the docstore's source table
                 yield {
                     "type": "sources",
-                    "content": list(set(sources))
+                    "content": list({doc.source: doc.source_info for doc in docs}.values())
                 }
 
+            logger.info(f"Query stages: {timer.summary()}")
+
         except Exception as e:
             logger.error(f"Medical query processing error: {e}")
             yield {
                 "type": "error",
                 "content": "I apologize, but I encountered an error processing your medical query."
             }
+        finally:
+            generation.release()
+
+    def answer_batch(self, questions: List[str], k: int = 8) -> Iterator[Dict[str, Any]]:
+        """
+        Answer many independent questions. Retrieval runs once for the whole
+        batch, chunks retrieved by several questions are read and scored
+        once, and repeated questions are answered once; generation fans out
+        over the bounded batch pool. Yields one result per question, in
+        completion order, with its position in the input as "index".
+        """
+        # Questions that only differ in case or punctuation share retrieval and generation
+        groups: Dict[str, List[int]] = {}
+        for i, question in enumerate(questions):
+            groups.setdefault(normalize_query(question), []).append(i)
+        unique = [questions[indices[0]] for indices in groups.values()]
+
+        with self.use_generation() as generation:
+            docs_per_question = self.batch_search(unique, k, generation)
+            llm = self.get_llm()
+
+            def answer(question: str, docs: List[MedicalChunk]):
+                query_type = self.classify_medical_query(question)
+                prompt = get_specialized_medical_prompt(query_type, self.generate_medical_context(docs, query_type),
+                                                        question)
+                try:
+                    response = llm.invoke(prompt)
+                    content = response.content if hasattr(response, 'content') else str(response)
+                    content, flags = StreamingOutputFilter().scan(content)
+                except Exception as e:
+                    logger.error(f"Batch generation error: {e}")
+                    content, flags = self._fallback_answer(query_type), []
+                return query_type, content, flags, list(dict.fromkeys(doc.source for doc in docs))
+
+            futures = {
+                batch_executor.submit(answer, question, docs): indices
+                for question, docs, indices in zip(unique, docs_per_question, groups.values())
+            }
+            try:
+                for future in as_completed(futures):
+                    query_type, content, flags, sources = future.result()
+                    for i in futures[future]:
+                        yield {
+                            "index": i,
+                            "question": questions[i],
+                            "query_type": query_type,
+                            "answer": content,
+                            "sources": sources,
+                            "safety_flags": flags,
+                            "disclaimer_required": medical_disclaimer_required(query_type),
+                        }
+            finally:
+                # Client went away: drop generations that have not started
+                for future in futures:
+                    future.cancel()
+
+    @staticmethod
+    def _chunk_key(chunk: MedicalChunk):
+        return chunk.chunk_id if chunk.chunk_id is not None else chunk.text
+
+    @staticmethod
+    def _safety_flag_events(flags: List[str]) -> Iterator[Dict[str, Any]]:
+        for flag in flags:
+            yield {"type": "safety_flag", "category": flag, "content": FLAG_MESSAGES[flag]}
+
+    @staticmethod
+    def _fallback_answer(query_type: str) -> str:
+        return f"I understand you're asking about {query_type}-related information. Based on the available medical literature, I can provide some general guidance, but please consult with a healthcare professional for personalized advice."
+
+    @staticmethod
+    def _timed_stage(timer: StageTimer, name: str, func, *args):
+        with timer.stage(name):
+            return func(*args)
 
     def enhance_source_credibility(self, sources: List[str]) -> List[Dict[str, Any]]:
         """Add credibility indicators to sources"""
-        enhanced_sources = []
-
-        for source in sources:
-            credibility_score = self.calculate_source_credibility(source)
-            enhanced_sources.append({
-                "name": source.split('/')[-1] if '/' in source else source,
-                "credibility": credibility_score,
-                "icon": "🏥" if credibility_score >= 0.8 else "📚"
-            })
-
-        return enhanced_sources
+        table = self.docstore.source_info if self.docstore is not None else {}
+        return [dict(table.get(source) or cached_source_info(source)) for source in sources]
 
     def calculate_source_credibility(self, source: str) -> float:
         """Calculate credibility score for medical sources"""
-        high_credibility_indicators = [
-            'pubmed', 'nejm', 'jama', 'mayo', 'nih', 'who', 'cdc',
-            'medical', 'journal', 'peer-reviewed'
-        ]
-
-        source_lower = source.lower()
-        matches = sum(1 for indicator in high_credibility_indicators if indicator in source_lower)
-
-        # Base credibility score
-        base_score = 0.5
-        credibility_boost = min(matches * 0.2, 0.4)
-
-        return min(base_score + credibility_boost, 1.0)
+        return cached_source_info(source)["credibility"]
@@ -0,0 +1,68 @@
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import logging
+from typing import Iterator
+from langchain.schema import Document
+from langchain_community.document_loaders import PyPDFLoader
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_cached_pages(path: str, cache_dir: str) -> Iterator[Document]:
+    """
+    Yield the pages of one PDF, parsing it only if no cache entry exists
+    for its content hash. Cache entries are gzip-compressed JSONL, one page
+    per line, written alongside the first parse and renamed into place once
+    complete so an interrupted parse never leaves a partial entry; the
+    partial file is removed if the consumer stops before the last page.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, f"{file_digest(path)}.jsonl.gz")
+
+    if os.path.exists(cache_path):
+        logger.info(f"Parse cache hit for {path}")
+        with gzip.open(cache_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                # The same content may have been cached under another path
+                record["metadata"]["source"] = path
+                yield Document(page_content=record["page_content"], metadata=record["metadata"])
+        return
+
+    logger.info(f"Parsing {path}")
+    # A unique partial file per parse, so concurrent parses of the same PDF do not interleave
+    fd, partial_path = tempfile.mkstemp(prefix=os.path.basename(cache_path) + ".", suffix=".partial", dir=cache_dir)
+    complete = False
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', compresslevel=6) as f:
+            for page in PyPDFLoader(path).lazy_load():
+                f.write(json.dumps({"page_content": page.page_content, "metadata": page.metadata}) + "\n")
+                yield page
+        os.replace(partial_path, cache_path)
+        complete = True
+    finally:
+        # Also runs when the consumer stops early or raises (GeneratorExit)
+        if not complete:
+            try:
+                os.remove(partial_path)
+            except FileNotFoundError:
+                pass
+
+
+def iter_pdf_pages(data: str, cache_dir: str) -> Iterator[Document]:
+    """Lazily yield pages of every PDF in a directory through the parse cache"""
+    for name in sorted(os.listdir(data)):
+        if name.endswith('.pdf'):
+            yield from iter_cached_pages(os.path.join(data, name), cache_dir)
@@ -0,0 +1,95 @@
+import re
+import json
+import time
+import threading
+from typing import Dict, Any, List, Optional
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _NON_WORD.sub(' ', query.lower()).strip()
+
+
+class PrefetchCache:
+    """
+    Short-TTL, per-session cache of retrieval results warmed while the user
+    is still typing. A submitted query hits when it matches a warmed draft
+    exactly after normalization, or shares enough of its words with one.
+
+    Drafts live in the shared key-value store (Redis, or in-process while it
+    is unreachable), because /prefetch and the following /get are usually
+    served by different workers; payloads must therefore be JSON-safe. The
+    hit/miss counters are this worker's own.
+    """
+
+    def __init__(self, store, ttl_seconds: float = 30.0, similarity: float = 0.8, drafts_per_session: int = 3):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.drafts_per_session = drafts_per_session
+        self._lock = threading.Lock()
+        self.prefetches = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"prefetch:{session_id}"
+
+    def _drafts(self, session_id: str) -> List[list]:
+        """Unexpired [normalized query, expiry, payload] entries, oldest first"""
+        raw = self.store.get(self._key(session_id))
+        if not raw:
+            return []
+        try:
+            drafts = json.loads(raw)
+        except ValueError:
+            return []
+        now = time.time()  # wall clock: expiry is compared across workers
+        return [d for d in drafts if d[1] > now]
+
+    def put(self, session_id: str, query: str, payload: Any):
+        key = normalize_query(query)
+        drafts = [d for d in self._drafts(session_id) if d[0] != key]
+        drafts.append([key, time.time() + self.ttl_seconds, payload])
+        self.store.set(self._key(session_id), json.dumps(drafts[-self.drafts_per_session:]),
+                       int(self.ttl_seconds) + 1)
+        with self._lock:
+            self.prefetches += 1
+
+    def get(self, session_id: str, query: str) -> Optional[Any]:
+        key = normalize_query(query)
+        words = frozenset(key.split())
+        best, best_score = None, 0.0
+        for draft_key, _, payload in reversed(self._drafts(session_id)):
+            if draft_key == key:
+                best, best_score = payload, 1.0
+                break
+            draft_words = frozenset(draft_key.split())
+            union = words | draft_words
+            score = len(words & draft_words) / len(union) if union else 0.0
+            if score > best_score:
+                best, best_score = payload, score
+
+        with self._lock:
+            if best is not None and best_score >= self.similarity:
+                self.hits += 1
+                return best
+            self.misses += 1
+            return None
+
+    def contains(self, session_id: str, query: str) -> bool:
+        """True if this exact draft is already warm, so the client need not be served again"""
+        key = normalize_query(query)
+        return any(d[0] == key for d in self._drafts(session_id))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "prefetches": self.prefetches,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
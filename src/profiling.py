@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from typing import Iterator, Optional, Tuple
+from src.timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def should_profile(sample_rate: float, forced: bool = False) -> bool:
+    """Per-request sampling decision; a float comparison when profiling is off (reading the settings is extra)"""
+    return forced or (sample_rate > 0 and random.random() < sample_rate)
+
+
+def _frame_label(frame) -> Tuple[str, str, int]:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of one request from a background thread.
+
+    The request thread is whichever thread iterates the response stream.
+    Stage executor threads are sampled while they run one of this
+    request's StageTimer stages. Every stack is rooted at a
+    "stage:<name>" frame, so flamegraphs split by pipeline stage.
+    """
+
+    def __init__(self, timer: StageTimer, interval_ms: float = 5.0):
+        self.timer = timer
+        self.interval = interval_ms / 1000
+        self.request_thread: Optional[int] = None
+        self.samples: Counter = Counter()
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        timer.track_threads = True
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            active = self.timer.active_stages()
+            targets = set(active)
+            if self.request_thread is not None:
+                targets.add(self.request_thread)
+            for ident in targets:
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append((f"stage:{active.get(ident, 'request')}", "", 0))
+                self.samples[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, one 'a;b;c count' line per stack"""
+        lines = []
+        for stack, count in self.samples.most_common():
+            names = [name if not filename else f"{name} ({os.path.basename(filename)}:{line})"
+                     for name, filename, line in stack]
+            lines.append(f"{';'.join(names)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> dict:
+        """Sampled-profile document for https://www.speedscope.app"""
+        frames, index = [], {}
+        samples, weights = [], []
+        interval_ms = self.interval * 1000
+        for stack, count in self.samples.items():
+            ids = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frame_name, filename, line = label
+                    frames.append({"name": frame_name, "file": filename, "line": line} if filename
+                                  else {"name": frame_name})
+                ids.append(index[label])
+            samples.append(ids)
+            weights.append(count * interval_ms)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "medibot",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def write(self, directory: str, name: str, output_format: str = 'speedscope') -> str:
+        """Write the profile and the timer's stage summary next to it; returns the profile path"""
+        os.makedirs(directory, exist_ok=True)
+        if output_format == 'collapsed':
+            path = os.path.join(directory, f"{name}.collapsed.txt")
+            with open(path, 'w') as f:
+                f.write(self.collapsed())
+        else:
+            path = os.path.join(directory, f"{name}.speedscope.json")
+            with open(path, 'w') as f:
+                json.dump(self.speedscope(name), f)
+        with open(os.path.join(directory, f"{name}.stages.json"), 'w') as f:
+            json.dump({"wall_ms": round(self.elapsed * 1000, 2), "samples": sum(self.samples.values()),
+                       **self.timer.summary()}, f)
+        return path
+
+
+def profile_stream(stream: Iterator, profiler: SamplingProfiler, directory: str, name: str,
+                   output_format: str = 'speedscope') -> Iterator:
+    """
+    Wrap a streaming response body so profiling covers the generator after
+    the view has returned, and ends when the stream finishes or the client
+    disconnects.
+    """
+    profiler.request_thread = threading.get_ident()
+    profiler.start()
+    try:
+        for item in stream:
+            yield item
+            # The server may resume the stream on another thread
+            profiler.request_thread = threading.get_ident()
+    finally:
+        profiler.stop()
+        try:
+            path = profiler.write(directory, name, output_format)
+            logger.info(f"🔬 Request profile written to {path}")
+        except OSError as e:
+            logger.error(f"Could not write request profile: {e}")
@@ -0,0 +1,241 @@
+import os
+import json
+import logging
+from typing import List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32.npy"
+CODES_FILE = "codes.npy"
+PARAMS_FILE = "quantization.npz"
+INFO_FILE = "vector_index.json"
+
+QUANTIZATION_TYPES = ('float32', 'float16', 'int8', 'pq')
+
+# Rows scored per block so temporary float32 copies of the codes stay small
+SEARCH_BLOCK_ROWS = 8192
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so inner product equals cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def train_product_quantizer(vectors: np.ndarray, subspaces: int, iterations: int = 20,
+                            sample_size: int = 65536, seed: int = 0) -> np.ndarray:
+    """Train one 256-centroid k-means codebook per subspace; returns (m, 256, d/m)"""
+    n, dim = vectors.shape
+    if dim % subspaces:
+        raise ValueError(f"Dimension {dim} is not divisible by {subspaces} subspaces")
+    sub_dim = dim // subspaces
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(n, size=min(n, sample_size), replace=False)]
+    centroids = min(256, len(sample))
+
+    codebooks = np.zeros((subspaces, 256, sub_dim), dtype=np.float32)
+    for j in range(subspaces):
+        data = sample[:, j * sub_dim:(j + 1) * sub_dim]
+        book = data[rng.choice(len(data), size=centroids, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _nearest_centroid(data, book)
+            sums = np.zeros_like(book)
+            np.add.at(sums, assignment, data)
+            counts = np.bincount(assignment, minlength=centroids)[:, None]
+            filled = counts[:, 0] > 0
+            book[filled] = sums[filled] / counts[filled]
+        codebooks[j, :centroids] = book
+    return codebooks
+
+
+def _nearest_centroid(data: np.ndarray, book: np.ndarray) -> np.ndarray:
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2; ||x||^2 is constant per row
+    distances = (book * book).sum(axis=1)[None, :] - 2.0 * data @ book.T
+    return distances.argmin(axis=1)
+
+
+def encode_product_quantizer(vectors: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    subspaces, _, sub_dim = codebooks.shape
+    codes = np.empty((len(vectors), subspaces), dtype=np.uint8)
+    for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+        block = vectors[start:start + SEARCH_BLOCK_ROWS]
+        for j in range(subspaces):
+            codes[start:start + len(block), j] = _nearest_centroid(
+                block[:, j * sub_dim:(j + 1) * sub_dim], codebooks[j])
+    return codes
+
+
+def quantize(vectors: np.ndarray, quantization: str = 'int8', pq_subspaces: int = 48) -> Tuple[np.ndarray, dict]:
+    """Encode normalized float32 vectors; returns (codes, params)"""
+    if quantization == 'float32':
+        return vectors, {}
+    if quantization == 'float16':
+        return vectors.astype(np.float16), {}
+    if quantization == 'int8':
+        # Per-dimension affine scalar quantization into [-128, 127]
+        low = vectors.min(axis=0)
+        scale = (vectors.max(axis=0) - low) / 255.0
+        scale[scale == 0] = 1.0
+        codes = np.clip(np.rint((vectors - low) / scale) - 128, -128, 127).astype(np.int8)
+        return codes, {"low": low.astype(np.float32), "scale": scale.astype(np.float32)}
+    if quantization == 'pq':
+        codebooks = train_product_quantizer(vectors, pq_subspaces)
+        return encode_product_quantizer(vectors, codebooks), {"codebooks": codebooks}
+    raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATION_TYPES}")
+
+
+def write_vector_index(directory: str, vectors: np.ndarray, quantization: str = 'int8', pq_subspaces: int = 48) -> dict:
+    """
+    Write a local vector index: full-precision vectors for exact re-scoring
+    (memory-mapped, not resident) plus compact codes used for the scan.
+    Row i is chunk id i in the docstore.
+    """
+    os.makedirs(directory, exist_ok=True)
+    vectors = normalize_rows(vectors)
+    codes, params = quantize(vectors, quantization, pq_subspaces)
+
+    np.save(os.path.join(directory, VECTORS_FILE), vectors)
+    np.save(os.path.join(directory, CODES_FILE), codes)
+    np.savez(os.path.join(directory, PARAMS_FILE), **params)
+
+    info = {
+        "quantization": quantization,
+        "count": int(vectors.shape[0]),
+        "dimension": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "code_bytes": int(codes.nbytes),
+    }
+    with open(os.path.join(directory, INFO_FILE), 'w') as f:
+        json.dump(info, f)
+    logger.info(f"Wrote {info['count']} vectors ({quantization}, {codes.nbytes / 1e6:.1f} MB of codes) to {directory}")
+    return info
+
+
+def approximate_scores(query: np.ndarray, codes: np.ndarray, quantization: str, params: dict) -> np.ndarray:
+    """
+    Vectorized inner-product scores against a block of codes. A single
+    normalized query (d,) gives (rows,); a batch (q, d) gives (rows, q).
+    """
+    if quantization in ('float32', 'float16'):
+        return codes.astype(np.float32, copy=False) @ query.T
+    if quantization == 'int8':
+        # q . (low + (c + 128) * scale) = q.low + 128 q.scale + c . (q * scale)
+        weighted = query * params["scale"]
+        offset = query @ params["low"] + 128.0 * weighted.sum(axis=-1)
+        return codes.astype(np.float32) @ weighted.T + offset
+    if quantization == 'pq':
+        if query.ndim == 2:
+            return np.stack([approximate_scores(q, codes, quantization, params) for q in query], axis=1)
+        codebooks = params["codebooks"]
+        subspaces, _, sub_dim = codebooks.shape
+        table = np.einsum('mcd,md->mc', codebooks, query.reshape(subspaces, sub_dim))
+        return table[np.arange(subspaces), codes].sum(axis=1)
+    raise ValueError(f"Unknown quantization '{quantization}'")
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def scan_codes(query: np.ndarray, codes: np.ndarray, quantization: str, params: dict, k: int,
+               offset: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Blockwise approximate top-k over a code array; returns (ids + offset, scores), best first"""
+    best_ids, best_scores = [], []
+    for block_start in range(0, len(codes), SEARCH_BLOCK_ROWS):
+        scores = approximate_scores(query, codes[block_start:block_start + SEARCH_BLOCK_ROWS], quantization, params)
+        order = top_k(scores, k)
+        best_ids.append(order + block_start)
+        best_scores.append(scores[order])
+    if not best_ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    ids, scores = np.concatenate(best_ids), np.concatenate(best_scores)
+    order = top_k(scores, k)
+    return ids[order] + offset, scores[order]
+
+
+def scan_codes_batch(queries: np.ndarray, codes: np.ndarray, quantization: str, params: dict, k: int,
+                     offset: int = 0) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """scan_codes for several queries at once, scoring each block with one matrix product"""
+    best = [([], []) for _ in range(len(queries))]
+    for block_start in range(0, len(codes), SEARCH_BLOCK_ROWS):
+        scores = approximate_scores(queries, codes[block_start:block_start + SEARCH_BLOCK_ROWS], quantization, params)
+        for j, (ids, values) in enumerate(best):
+            column = scores[:, j]
+            order = top_k(column, k)
+            ids.append(order + block_start)
+            values.append(column[order])
+
+    results = []
+    for ids, values in best:
+        if not ids:
+            results.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+            continue
+        ids, values = np.concatenate(ids), np.concatenate(values)
+        order = top_k(values, k)
+        results.append((ids[order] + offset, values[order]))
+    return results
+
+
+class QuantizedVectorIndex:
+    """Local vector index with quantized scan and exact float32 re-scoring"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, INFO_FILE)) as f:
+            self.info = json.load(f)
+        self.quantization = self.info["quantization"]
+        self.codes = np.load(os.path.join(directory, CODES_FILE))
+        with np.load(os.path.join(directory, PARAMS_FILE)) as params:
+            self.params = {key: params[key] for key in params.files}
+        # Full-precision rows are only touched for the few re-scored candidates
+        self.vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode='r')
+        logger.info(f"Loaded {len(self)} {self.quantization} vectors from {directory}")
+
+    @staticmethod
+    def exists(directory) -> bool:
+        return bool(directory) and os.path.exists(os.path.join(directory, INFO_FILE))
+
+    def __len__(self) -> int:
+        return self.info["count"]
+
+    def scan(self, query: np.ndarray, k: int, start: int = 0, stop: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k over rows [start, stop); returns (ids, scores)"""
+        stop = len(self) if stop is None else stop
+        return scan_codes(query, self.codes[start:stop], self.quantization, self.params, k, offset=start)
+
+    def rescore(self, query: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact cosine scores for candidate ids; returns the best k"""
+        if len(ids) == 0:
+            return ids, np.empty(0, dtype=np.float32)
+        sorted_ids = np.sort(ids)
+        exact = np.asarray(self.vectors[sorted_ids], dtype=np.float32) @ query
+        order = top_k(exact, k)
+        return sorted_ids[order], exact[order]
+
+    def candidate_count(self, k: int, rescore_factor: int) -> int:
+        """How many approximate candidates to re-score for a final top-k"""
+        return k if self.quantization == 'float32' else k * rescore_factor
+
+    def search(self, query_vector, k: int = 8, rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k chunk ids and cosine scores for one query embedding"""
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32))
+        ids, _ = self.scan(query, self.candidate_count(k, rescore_factor))
+        return self.rescore(query, ids, k)
+
+    def search_batch(self, query_vectors, k: int = 8, rescore_factor: int = 4) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search() for several query embeddings in one pass over the codes"""
+        queries = normalize_rows(np.asarray(query_vectors, dtype=np.float32))
+        candidates = scan_codes_batch(queries, self.codes, self.quantization, self.params,
+                                      self.candidate_count(k, rescore_factor))
+        return [self.rescore(query, ids, k) for query, (ids, _) in zip(queries, candidates)]
+
+    def close(self):
+        """Drop the codes and the float32 memory map"""
+        self.codes = None
+        self.vectors = None
@@ -0,0 +1,118 @@
+import re
+from typing import Dict, List
+
+# Lay terms and abbreviations mapped to the clinical vocabulary used in textbooks
+MEDICAL_SYNONYMS: Dict[str, List[str]] = {
+    'heart attack': ['myocardial infarction'],
+    'high blood pressure': ['hypertension'],
+    'high bp': ['hypertension'],
+    'low blood pressure': ['hypotension'],
+    'low bp': ['hypotension'],
+    'bp': ['blood pressure'],
+    'mi': ['myocardial infarction'],
+    'stroke': ['cerebrovascular accident', 'cerebral infarction'],
+    'mini stroke': ['transient ischemic attack'],
+    'tia': ['transient ischemic attack'],
+    'high blood sugar': ['hyperglycemia'],
+    'low blood sugar': ['hypoglycemia'],
+    'diabetes': ['diabetes mellitus'],
+    'high cholesterol': ['hypercholesterolemia', 'hyperlipidemia'],
+    'heartburn': ['gastroesophageal reflux disease'],
+    'acid reflux': ['gastroesophageal reflux disease'],
+    'gerd': ['gastroesophageal reflux disease'],
+    'kidney stones': ['nephrolithiasis'],
+    'kidney stone': ['nephrolithiasis'],
+    'gallstones': ['cholelithiasis'],
+    'shortness of breath': ['dyspnea'],
+    'short of breath': ['dyspnea'],
+    'sob': ['dyspnea'],
+    'fast heartbeat': ['tachycardia'],
+    'slow heartbeat': ['bradycardia'],
+    'irregular heartbeat': ['arrhythmia', 'atrial fibrillation'],
+    'afib': ['atrial fibrillation'],
+    'copd': ['chronic obstructive pulmonary disease'],
+    'uti': ['urinary tract infection'],
+    'bladder infection': ['cystitis', 'urinary tract infection'],
+    'pink eye': ['conjunctivitis'],
+    'flu': ['influenza'],
+    'chickenpox': ['varicella'],
+    'shingles': ['herpes zoster'],
+    'mono': ['infectious mononucleosis'],
+    'tb': ['tuberculosis'],
+    'hiv': ['human immunodeficiency virus'],
+    'std': ['sexually transmitted disease'],
+    'sti': ['sexually transmitted infection'],
+    'migraine': ['migraine headache'],
+    'seizure': ['epileptic seizure', 'convulsion'],
+    'nosebleed': ['epistaxis'],
+    'bed sores': ['pressure ulcers', 'decubitus ulcers'],
+    'blood clot': ['thrombosis', 'embolism'],
+    'dvt': ['deep vein thrombosis'],
+    'varicose veins': ['venous insufficiency'],
+    'hives': ['urticaria'],
+    'eczema': ['atopic dermatitis'],
+    'dandruff': ['seborrheic dermatitis'],
+    'swelling': ['edema'],
+    'fainting': ['syncope'],
+    'itching': ['pruritus'],
+    'hair loss': ['alopecia'],
+    'joint pain': ['arthralgia'],
+    'muscle pain': ['myalgia'],
+    'bone loss': ['osteoporosis'],
+    'ibs': ['irritable bowel syndrome'],
+    'underactive thyroid': ['hypothyroidism'],
+    'overactive thyroid': ['hyperthyroidism'],
+    'anemia': ['anaemia', 'iron deficiency'],
+    'cancer': ['malignancy', 'neoplasm'],
+    'tumor': ['neoplasm'],
+    'dementia': ['alzheimer disease'],
+    'adhd': ['attention deficit hyperactivity disorder'],
+    'ocd': ['obsessive-compulsive disorder'],
+    'ptsd': ['post-traumatic stress disorder'],
+    'depression': ['major depressive disorder'],
+}
+
+
+class QueryExpander:
+    """
+    Rewrites lay phrasing into clinical variants using one precompiled
+    alternation of every dictionary key (longest first, whole words only)
+    and a dict lookup per match.
+    """
+
+    def __init__(self, synonyms: Dict[str, List[str]] = MEDICAL_SYNONYMS, max_variants: int = 3):
+        self.synonyms = {key.lower(): values for key, values in synonyms.items()}
+        self.max_variants = max_variants
+        keys = sorted(self.synonyms, key=len, reverse=True)
+        self.pattern = re.compile(r'\b(?:' + '|'.join(re.escape(key) for key in keys) + r')\b', re.IGNORECASE)
+
+    def expand(self, query: str) -> List[str]:
+        """The original query followed by up to max_variants rewritten variants"""
+        matches = list(self.pattern.finditer(query))
+        if not matches:
+            return [query]
+
+        variants = [query]
+        # Variant i replaces every matched phrase by its i-th synonym (or its last one)
+        depth = max(len(self.synonyms[match.group(0).lower()]) for match in matches)
+        for i in range(min(depth, self.max_variants)):
+            def replace(match, i=i):
+                options = self.synonyms[match.group(0).lower()]
+                return options[min(i, len(options) - 1)]
+            variant = self.pattern.sub(replace, query)
+            if variant not in variants:
+                variants.append(variant)
+        return variants
+
+
+def reciprocal_rank_fusion(rankings: List[list], key, k: int, constant: int = 60) -> list:
+    """Fuse ranked lists by reciprocal rank, deduplicating items by key"""
+    scores = {}
+    items = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (constant + rank + 1)
+            items.setdefault(item_key, item)
+    ordered = sorted(scores, key=scores.__getitem__, reverse=True)
+    return [items[item_key] for item_key in ordered[:k]]
@@ -0,0 +1,167 @@
+import time
+import logging
+import threading
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse, urlunparse
+import redis
+from limits.storage.base import Storage, SlidingWindowCounterSupport
+from src.redis_store import shared_connection_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_TRACKED_KEYS = 10000  # allowance entries kept per worker before stale ones are dropped
+
+# Sliding-window counter check plus allowance lease, atomic in one round-trip.
+# Two fixed buckets per key; the previous one is weighted by how much of it
+# still overlaps the sliding window (the same estimate limits uses).
+# First returns the unspent part of the caller's previous lease to the bucket
+# it was taken from, if that bucket still exists. Grants the requested amount,
+# plus up to a fraction of the remaining headroom for the caller to spend
+# locally; returns {grant, bucket}, with grant 0 when over the limit.
+SLIDING_WINDOW_LEASE = """
+local now = redis.call('TIME')
+local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local limit = tonumber(ARGV[1])
+local expiry = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local refund = tonumber(ARGV[6])
+if refund > 0 then
+    local refund_key = KEYS[1] .. '/' .. ARGV[7]
+    local spent = tonumber(redis.call('GET', refund_key) or '0')
+    if spent > 0 then
+        redis.call('DECRBY', refund_key, math.min(refund, spent))
+    end
+end
+local window = math.floor(t / expiry)
+local current_key = KEYS[1] .. '/' .. window
+local previous = tonumber(redis.call('GET', KEYS[1] .. '/' .. (window - 1)) or '0')
+local current = tonumber(redis.call('GET', current_key) or '0')
+local weight = 1 - (t - window * expiry) / expiry
+local available = limit - (math.floor(previous * weight) + current)
+if available < amount then
+    return {0, window}
+end
+local grant = math.max(amount, math.min(tonumber(ARGV[4]), math.floor(available * tonumber(ARGV[5]))))
+redis.call('INCRBY', current_key, grant)
+redis.call('EXPIRE', current_key, math.ceil(2 * expiry))
+return {grant, window}
+"""
+
+# Fixed-window counter, for the fixed-window strategy
+INCR_EXPIRE = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value == tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+
+class LeasedRedisStorage(Storage, SlidingWindowCounterSupport):
+    """
+    Rate-limit storage shared by every worker through Redis, for the
+    sliding-window-counter strategy (leased+redis://host:port/db).
+
+    Each check is one server-side script. A key checked again within
+    allowance_ttl seconds is hot: the script then also leases a few extra
+    permits that this worker spends from a local allowance cache until
+    allowance_ttl runs out, so hot keys mostly skip the round-trip. Leases
+    are capped by lease_fraction of the remaining headroom. The unspent
+    part of a lease is handed back to Redis by the key's next check, so a
+    client whose requests are spaced out gets exactly its limit; only the
+    lease of a key that is never checked again stays counted.
+    """
+
+    STORAGE_SCHEME = ["leased+redis"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, allowance_ttl: float = 1.0, max_lease: int = 16,
+                 lease_fraction: float = 0.1, socket_timeout: float = 0.25, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urlparse(uri)
+        # A slow Redis must not stall requests; errors trigger the limiter's in-memory fallback
+        url = urlunparse(parsed._replace(scheme=parsed.scheme.split('+', 1)[1]))
+        self.client = redis.Redis(connection_pool=shared_connection_pool(url, socket_timeout=socket_timeout,
+                                                                         connect_timeout=socket_timeout))
+        self.allowance_ttl = allowance_ttl
+        self.max_lease = max_lease
+        self.lease_fraction = lease_fraction
+        self._lease_script = self.client.register_script(SLIDING_WINDOW_LEASE)
+        self._incr_script = self.client.register_script(INCR_EXPIRE)
+        self._allowances: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.remote_checks = 0
+
+    @property
+    def base_exceptions(self):
+        return redis.RedisError
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            # [permits left, spendable until, bucket they were counted in, last remote check]
+            allowance = self._allowances.pop(key, None)
+            if allowance is not None and allowance[1] > now and allowance[0] >= amount:
+                allowance[0] -= amount
+                self._allowances[key] = allowance
+                self.local_hits += 1
+                return True
+            if len(self._allowances) >= MAX_TRACKED_KEYS:
+                self._prune(now)
+
+        # Lease only for keys that came back within the TTL; a lone request takes exactly what it needs
+        hot = allowance is not None and now - allowance[3] <= self.allowance_ttl
+        refund, bucket = (allowance[0], allowance[2]) if allowance is not None else (0, 0)
+        self.remote_checks += 1
+        granted, bucket = self._lease_script(keys=[key], args=[limit, expiry, amount,
+                                                               self.max_lease if hot else amount,
+                                                               self.lease_fraction, refund, bucket])
+        granted = int(granted)
+        with self._lock:
+            self._allowances[key] = [max(granted - amount, 0), now + min(self.allowance_ttl, expiry), int(bucket), now]
+        return granted >= amount
+
+    def _prune(self, now: float):
+        # Forget keys not checked for a while; their unspent leases stay counted until the buckets expire
+        stale = [key for key, allowance in self._allowances.items() if now - allowance[3] > self.allowance_ttl]
+        for key in stale:
+            del self._allowances[key]
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        t = time.time()
+        window = int(t // expiry)
+        previous, current = self.client.mget(f"{key}/{window - 1}", f"{key}/{window}")
+        remaining = (window + 1) * expiry - t
+        return int(previous or 0), remaining, int(current or 0), remaining + expiry
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        window = int(time.time() // expiry)
+        with self._lock:
+            self._allowances.pop(key, None)
+        self.client.delete(f"{key}/{window - 1}", f"{key}/{window}")
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        return int(self._incr_script(keys=[key], args=[amount, int(expiry)]))
+
+    def get(self, key: str) -> int:
+        return int(self.client.get(key) or 0)
+
+    def get_expiry(self, key: str) -> float:
+        return time.time() + max(self.client.ttl(key), 0)
+
+    def check(self) -> bool:
+        try:
+            return self.client.ping()
+        except redis.RedisError:
+            return False
+
+    def reset(self) -> int:
+        with self._lock:
+            self._allowances.clear()
+        keys = list(self.client.scan_iter(match="LIMIT*"))
+        return self.client.delete(*keys) if keys else 0
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._allowances.pop(key, None)
+        self.client.delete(key)
@@ -0,0 +1,205 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import redis
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[tuple, redis.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def shared_connection_pool(url: str, max_connections: int = 50, socket_timeout: float = 0.1,
+                           connect_timeout: float = 0.1, pool_timeout: float = 0.05) -> redis.ConnectionPool:
+    """
+    One bounded pool per Redis URL, options and process, shared by every
+    store that asks for the same settings. Keying on the options too means
+    a caller with stricter timeouts never silently gets another caller's
+    pool. Timeouts are strict: a slow Redis should trip the circuit breaker
+    rather than hold a request thread.
+    """
+    key = (url, max_connections, socket_timeout, connect_timeout, pool_timeout)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = redis.BlockingConnectionPool.from_url(
+                url,
+                max_connections=max_connections,
+                timeout=pool_timeout,  # wait for a free connection at most this long
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=connect_timeout,
+                socket_keepalive=True,
+                health_check_interval=30,
+                decode_responses=True,
+            )
+            _pools[key] = pool
+        return pool
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. While open, calls are
+    refused without touching the network; after reset_timeout one trial call
+    is let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 10.0, name: str = "redis"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"🔌 {self.name} circuit closed")
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"⚠️ {self.name} circuit open after {self.failures} failure(s)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class LocalTTLStore:
+    """Bounded in-process key-value store with per-key expiry (LRU eviction)"""
+
+    def __init__(self, max_items: int = 10000):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class ResilientStore:
+    """
+    String key-value access backed by Redis, degrading to process-local
+    storage when Redis is missing, slow or down.
+
+    Reads go near-cache → Redis, and to the local fallback only while Redis
+    is unavailable; writes go to Redis and are mirrored locally, so data
+    written during an outage stays readable by this worker until Redis is
+    back. A key missing from a healthy Redis is missing, even if a local
+    copy outlived its expiry or deletion there. The near-cache keeps Redis reads for near_cache_ttl
+    seconds; another worker's write can therefore be seen that much late.
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None, breaker: Optional[CircuitBreaker] = None,
+                 near_cache_ttl: float = 2.0, local_max_items: int = 10000, **pool_options):
+        if client is None and url:
+            client = redis.Redis(connection_pool=shared_connection_pool(url, **pool_options))
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+        self.near_cache_ttl = near_cache_ttl
+        self.near_cache = LocalTTLStore(local_max_items)
+        self.fallback = LocalTTLStore(local_max_items)
+        self.near_hits = 0
+        self.redis_calls = 0
+        self.fallbacks = 0
+
+    def _call(self, operation):
+        """Run a Redis operation through the breaker; None (and a recorded failure) on any Redis error"""
+        if self.client is None or not self.breaker.allow():
+            self.fallbacks += 1
+            return None, False
+        self.redis_calls += 1
+        try:
+            result = operation()
+        except redis.RedisError as e:
+            logger.warning(f"Redis call failed: {e}")
+            self.breaker.record_failure()
+            self.fallbacks += 1
+            return None, False
+        self.breaker.record_success()
+        return result, True
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.near_cache.get(key)
+        if value is not None:
+            self.near_hits += 1
+            return value
+
+        value, ok = self._call(lambda: self.client.get(key))
+        if not ok:
+            # Redis unavailable (or breaker open): serve what this worker wrote meanwhile
+            return self.fallback.get(key)
+        # Redis answered; a missing key is authoritative, even if the local copy still has it
+        if value is not None and self.near_cache_ttl > 0:
+            self.near_cache.set(key, value, self.near_cache_ttl)
+        return value
+
+    def set(self, key: str, value: str, ttl: int) -> bool:
+        """Store a value; False when it only reached this worker's local fallback"""
+        self.fallback.set(key, value, ttl)
+        if self.near_cache_ttl > 0:
+            self.near_cache.set(key, value, min(self.near_cache_ttl, ttl))
+        _, ok = self._call(lambda: self.client.setex(key, ttl, value))
+        return ok
+
+    def delete(self, key: str):
+        self.near_cache.delete(key)
+        self.fallback.delete(key)
+        self._call(lambda: self.client.delete(key))
+
+    def ping(self) -> bool:
+        _, ok = self._call(lambda: self.client.ping())
+        return ok
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self.client is not None else "local",
+            "circuit": self.breaker.state,
+            "near_cache_hits": self.near_hits,
+            "redis_calls": self.redis_calls,
+            "fallbacks": self.fallbacks,
+        }
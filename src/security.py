@@ -3,52 +3,104 @@ import re
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, NamedTuple, Tuple
 import html
 import bleach
 import os
 
 logger = logging.getLogger(__name__)
 
+# Named PII patterns, in priority order when several match at the same position
+PII_PATTERNS = [
+    ('ssn', r'\b\d{3}-\d{2}-\d{4}\b'),
+    ('credit_card', r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b'),
+    ('email', r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),  # Email (partial)
+    ('phone', r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'),
+]
+
+EMERGENCY_KEYWORDS = [
+    'suicide', 'kill myself', 'end my life', 'overdose',
+    'chest pain', 'heart attack', 'stroke', 'bleeding heavily',
+    'can\'t breathe', 'emergency', 'urgent', 'dying'
+]
+
+
+class RedactionSpan(NamedTuple):
+    """A redacted region of the original input, for audit logging"""
+    kind: str
+    start: int
+    end: int
+
+
+class RedactionEngine:
+    """Detects and replaces all PII patterns in a single regex scan"""
+
+    def __init__(self, patterns=PII_PATTERNS, replacement: str = '[REDACTED]', trigger: str = r'[\d@]'):
+        self.replacement = replacement
+        self.pattern = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in patterns))
+        # Every PII pattern needs a digit or '@'; text without one skips the full scan
+        self.trigger = re.compile(trigger) if trigger else None
+
+    def redact(self, text: str) -> Tuple[str, List[RedactionSpan]]:
+        """Return the redacted text and the spans (in the original text) that were replaced"""
+        if self.trigger is not None and not self.trigger.search(text):
+            return text, []
+
+        spans = []
+        parts = []
+        last = 0
+        for match in self.pattern.finditer(text):
+            start, end = match.span()
+            spans.append(RedactionSpan(match.lastgroup, start, end))
+            parts.append(text[last:start])
+            parts.append(self.replacement)
+            last = end
+
+        if not spans:
+            return text, spans
+        parts.append(text[last:])
+        return ''.join(parts), spans
+
+
+_default_redaction_engine = RedactionEngine()
+
 
 class SecurityManager:
     """Enhanced security manager with HIPAA compliance features"""
 
     def __init__(self):
-        self.sensitive_patterns = [
-            r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
-            r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',  # Credit card
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # Email (partial)
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # Phone numbers
-        ]
+        self.sensitive_patterns = [pattern for _, pattern in PII_PATTERNS]
+        self.redaction_engine = _default_redaction_engine
 
     def sanitize_input(self, user_input: str) -> str:
         """Comprehensive input sanitization"""
+        return self.sanitize_input_with_spans(user_input)[0]
+
+    def sanitize_input_with_spans(self, user_input: str) -> Tuple[str, List[RedactionSpan]]:
+        """Sanitize input and also return the PII spans that were redacted"""
         if not user_input:
-            return ""
+            return "", []
+
+        # Redact on the raw text so patterns are not confused by HTML entities
+        cleaned, spans = self.redaction_engine.redact(user_input)
 
         # HTML sanitization
-        cleaned = html.escape(user_input)
+        cleaned = html.escape(cleaned)
 
-        # Remove potentially sensitive information patterns
-        for pattern in self.sensitive_patterns:
-            cleaned = re.sub(pattern, '[REDACTED]', cleaned)
+        # Additional cleaning with bleach; without a '<' there is no markup for it to parse
+        if '<' in user_input:
+            cleaned = bleach.clean(cleaned, tags=[], attributes={}, strip=True)
 
-        # Additional cleaning with bleach
-        cleaned = bleach.clean(cleaned, tags=[], attributes={}, strip=True)
+        return cleaned.strip(), spans
 
-        return cleaned.strip()
+    def redact_pii(self, text: str) -> str:
+        """Replace PII only, leaving the text otherwise as typed (for traces that are replayed later)"""
+        return self.redaction_engine.redact(text)[0]
 
     def detect_medical_emergency(self, text: str) -> bool:
         """Detect potential medical emergency keywords"""
-        emergency_keywords = [
-            'suicide', 'kill myself', 'end my life', 'overdose',
-            'chest pain', 'heart attack', 'stroke', 'bleeding heavily',
-            'can\'t breathe', 'emergency', 'urgent', 'dying'
-        ]
-
         text_lower = text.lower()
-        return any(keyword in text_lower for keyword in emergency_keywords)
+        return any(keyword in text_lower for keyword in EMERGENCY_KEYWORDS)
 
     def hash_session_id(self, session_id: str) -> str:
         """Create hashed version of session ID for logging"""
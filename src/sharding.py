@@ -0,0 +1,135 @@
+import os
+import heapq
+import atexit
+from itertools import islice
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+import numpy as np
+
+from src.quantization import QuantizedVectorIndex, normalize_rows, scan_codes, scan_codes_batch
+
+logger = logging.getLogger(__name__)
+
+# Per-worker view of the shared code array, set by the pool initializer
+_worker_state = {}
+
+
+def _attach_shared_codes(shm_name: str, shape: tuple, dtype: str, quantization: str, params: dict):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state['shm'] = shm
+    _worker_state['codes'] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    _worker_state['quantization'] = quantization
+    _worker_state['params'] = params
+
+
+def _scan_shard(query: np.ndarray, start: int, stop: int, k: int) -> List[Tuple[float, int]]:
+    ids, scores = scan_codes(query, _worker_state['codes'][start:stop], _worker_state['quantization'],
+                             _worker_state['params'], k, offset=start)
+    return list(zip(scores.tolist(), ids.tolist()))
+
+
+def _scan_shard_batch(queries: np.ndarray, start: int, stop: int, k: int) -> List[List[Tuple[float, int]]]:
+    results = scan_codes_batch(queries, _worker_state['codes'][start:stop], _worker_state['quantization'],
+                               _worker_state['params'], k, offset=start)
+    return [list(zip(scores.tolist(), ids.tolist())) for ids, scores in results]
+
+
+class ShardedSearcher:
+    """
+    Partitions a quantized index into row-range shards held in shared memory
+    and scans them in parallel on a process pool. Small corpora, or a shard
+    count of 1, are searched in-process with no pool at all.
+    """
+
+    def __init__(self, index: QuantizedVectorIndex, shards: int = 1, min_vectors: int = 200_000):
+        self.index = index
+        self.shards = max(1, shards)
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.bounds = [(0, len(index))]
+
+        if self.shards == 1 or len(index) < min_vectors:
+            logger.info(f"Single-shard in-process search over {len(index)} vectors")
+            return
+
+        codes = np.ascontiguousarray(index.codes)
+        self._shm = shared_memory.SharedMemory(create=True, size=codes.nbytes)
+        np.ndarray(codes.shape, dtype=codes.dtype, buffer=self._shm.buf)[:] = codes
+        # The shared copy replaces the private one in this process too
+        index.codes = np.ndarray(codes.shape, dtype=codes.dtype, buffer=self._shm.buf)
+
+        step = -(-len(index) // self.shards)
+        self.bounds = [(start, min(start + step, len(index))) for start in range(0, len(index), step)]
+        self._pool = ProcessPoolExecutor(
+            max_workers=len(self.bounds),
+            initializer=_attach_shared_codes,
+            initargs=(self._shm.name, codes.shape, codes.dtype.str, index.quantization, index.params),
+        )
+        # Each gunicorn worker owns its segment and pool; unlink the segment on a clean worker
+        # exit even if the generation is never released, or it outlives the process in /dev/shm
+        self._owner_pid = os.getpid()
+        atexit.register(self.close)
+        logger.info(f"Sharded search: {len(self.bounds)} shards over {len(index)} vectors")
+
+    @property
+    def parallel(self) -> bool:
+        return self._pool is not None
+
+    def scan(self, query: np.ndarray, k: int) -> np.ndarray:
+        """Approximate candidate ids, merged across shards"""
+        if not self.parallel:
+            ids, _ = self.index.scan(query, k)
+            return ids
+
+        futures = [self._pool.submit(_scan_shard, query, start, stop, k) for start, stop in self.bounds]
+        # Each shard returns its candidates best-first; k-way merge them on score
+        merged = heapq.merge(*(future.result() for future in futures), key=lambda item: item[0], reverse=True)
+        return np.fromiter((chunk_id for _, chunk_id in islice(merged, k)), dtype=np.int64)
+
+    def search(self, query_vector, k: int = 8, rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k chunk ids and exact cosine scores for one query embedding"""
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32))
+        ids = self.scan(query, self.index.candidate_count(k, rescore_factor))
+        return self.index.rescore(query, ids, k)
+
+    def search_batch(self, query_vectors, k: int = 8, rescore_factor: int = 4) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search() for several query embeddings with one round of shard scans"""
+        if not self.parallel:
+            return self.index.search_batch(query_vectors, k, rescore_factor)
+
+        queries = normalize_rows(np.asarray(query_vectors, dtype=np.float32))
+        candidates = self.index.candidate_count(k, rescore_factor)
+        futures = [self._pool.submit(_scan_shard_batch, queries, start, stop, candidates)
+                   for start, stop in self.bounds]
+        per_shard = [future.result() for future in futures]
+
+        results = []
+        for j, query in enumerate(queries):
+            merged = heapq.merge(*(shard[j] for shard in per_shard), key=lambda item: item[0], reverse=True)
+            ids = np.fromiter((chunk_id for _, chunk_id in islice(merged, candidates)), dtype=np.int64)
+            results.append(self.index.rescore(query, ids, k))
+        return results
+
+    def close(self):
+        """Stop the shard workers and free the shared segment; the index cannot be searched afterwards"""
+        if self._shm is not None:
+            atexit.unregister(self.close)
+            if os.getpid() != self._owner_pid:
+                # Inherited across a fork: the segment and pool belong to the parent
+                return
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._shm is not None:
+            # The index's codes are a view of the segment; drop them rather than copy them out,
+            # the index is closed with its generation (QuantizedVectorIndex.close drops them too)
+            self.index.codes = None
+            try:
+                self._shm.close()
+            except BufferError as e:
+                logger.warning(f"Shared code array still referenced at close: {e}")
+            self._shm.unlink()
+            self._shm = None
+
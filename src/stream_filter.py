@@ -0,0 +1,194 @@
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Set, Tuple
+from src.security import EMERGENCY_KEYWORDS, RedactionEngine, _default_redaction_engine
+
+SELF_HARM_TERMS = ['suicide', 'kill myself', 'end my life', 'overdose']
+# Fine in user input, but the model's own boilerplate ("in an emergency, call...",
+# "urgent care") would raise the banner on routine answers
+GENERIC_TERMS = ['emergency', 'urgent']
+# Emergency conditions are also ordinary topics ("A stroke needs care"); in output they
+# only count alongside an instruction to get help now
+URGENT_ACTION_TERMS = ['call 911', 'call 999', 'call 112', 'call an ambulance', 'call emergency services',
+                       'call your local emergency number', 'seek emergency care', 'seek emergency medical care',
+                       'seek immediate medical attention', 'go to the emergency room',
+                       'go to the nearest emergency room']
+
+# Phrases matched in model output as whole words, by group
+OUTPUT_TERM_GROUPS = {
+    'self_harm': SELF_HARM_TERMS,
+    'emergency_condition': [keyword for keyword in EMERGENCY_KEYWORDS
+                            if keyword not in SELF_HARM_TERMS + GENERIC_TERMS],
+    'urgent_action': URGENT_ACTION_TERMS,
+}
+# A flag is raised once every group it needs has matched somewhere in the answer
+OUTPUT_FLAG_RULES = {
+    'self_harm': {'self_harm'},
+    'emergency': {'emergency_condition', 'urgent_action'},
+}
+
+FLAG_MESSAGES = {
+    'self_harm': "🚨 If you or someone you know is in crisis, contact your local emergency number or a crisis line right away.",
+    'emergency': "🚨 If this may be an emergency, call your local emergency number now.",
+}
+
+# Characters a PII match can be built from; a trailing run of them may still grow into one
+_PII_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+@-")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class ScanState(NamedTuple):
+    """Where a scan stopped: automaton node, the last characters seen and matches awaiting their next character"""
+    node: int = 0
+    tail: str = ""
+    pending: FrozenSet[str] = frozenset()
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over lowercase phrases, reporting whole-word
+    matches only ("dying" does not match in "studying"). The automaton
+    itself is immutable and shared; callers carry a ScanState between
+    chunks, so a phrase split across two tokens is still found.
+    """
+
+    def __init__(self, terms: Dict[str, Iterable[str]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.outputs: List[Set[Tuple[str, int]]] = [set()]
+        self.max_length = 0
+        for category, phrases in terms.items():
+            for phrase in phrases:
+                state = 0
+                for ch in phrase.lower():
+                    nxt = self.goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(self.goto)
+                        self.goto[state][ch] = nxt
+                        self.goto.append({})
+                        self.outputs.append(set())
+                    state = nxt
+                self.outputs[state].add((category, len(phrase)))
+                self.max_length = max(self.max_length, len(phrase))
+
+        # Breadth-first fail links; outputs inherit those of their fail state
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.outputs[nxt] |= self.outputs[self.fail[nxt]]
+
+    def scan(self, text: str, state: ScanState = ScanState()) -> Tuple[ScanState, Set[str]]:
+        """Advance over text; returns the new state and the categories matched on the way"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        lowered = text.lower()
+        # The previous tail gives the character before a match that started in an earlier chunk
+        seen = state.tail + lowered
+        offset = len(state.tail)
+        node = state.node
+        found = set()
+        pending = state.pending
+        if pending and lowered:
+            # Matches that ended the previous chunk count if this chunk starts at a word boundary
+            if not _is_word_char(lowered[0]):
+                found |= pending
+            pending = frozenset()
+
+        for i, ch in enumerate(lowered):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not outputs[node]:
+                continue
+            end = offset + i
+            for category, length in outputs[node]:
+                start = end - length + 1
+                if start > 0 and _is_word_char(seen[start - 1]):
+                    continue
+                if i + 1 == len(lowered):
+                    pending = pending | {category}
+                elif not _is_word_char(lowered[i + 1]):
+                    found.add(category)
+        return ScanState(node, seen[-self.max_length:], pending), found
+
+    @staticmethod
+    def finish(state: ScanState) -> Set[str]:
+        """Matches still waiting for a following character; the end of the text is a word boundary"""
+        return set(state.pending)
+
+
+_output_automaton = KeywordAutomaton(OUTPUT_TERM_GROUPS)
+
+
+class StreamingOutputFilter:
+    """
+    Redacts PII and flags risky content in streamed model output, one chunk
+    at a time. Flagging never delays text. Redaction holds back only the
+    trailing run of characters that could still become PII (a partial
+    number, or a word that may turn out to be an email local part), capped
+    at max_holdback, so per-chunk work is bounded by chunk size.
+    """
+
+    def __init__(self, max_holdback: int = 64, automaton: KeywordAutomaton = _output_automaton,
+                 redaction_engine: RedactionEngine = _default_redaction_engine,
+                 rules: Dict[str, Set[str]] = OUTPUT_FLAG_RULES):
+        self.max_holdback = max_holdback
+        self.automaton = automaton
+        self.redaction_engine = redaction_engine
+        self.rules = rules
+        self.state = ScanState()
+        self.matched: Set[str] = set()
+        self.flagged: Set[str] = set()
+        self._pending = ""
+
+    def feed(self, text: str) -> Tuple[str, List[str]]:
+        """Return the text that is safe to emit now and any categories flagged for the first time"""
+        self.state, found = self.automaton.scan(text, self.state)
+        new_flags = self._new_flags(found)
+
+        buffer = self._pending + text
+        split = self._holdback_start(buffer)
+        self._pending = buffer[split:]
+        return self.redaction_engine.redact(buffer[:split])[0], new_flags
+
+    def flush(self) -> Tuple[str, List[str]]:
+        """Emit whatever is still held back, and flags for phrases that ended the stream"""
+        new_flags = self._new_flags(self.automaton.finish(self.state))
+        self.state = ScanState()
+        tail, self._pending = self._pending, ""
+        return (self.redaction_engine.redact(tail)[0] if tail else ""), new_flags
+
+    def scan(self, text: str) -> Tuple[str, List[str]]:
+        """Filter a complete, non-streamed answer"""
+        safe, flags = self.feed(text)
+        tail, final_flags = self.flush()
+        return safe + tail, flags + final_flags
+
+    def _new_flags(self, found: Set[str]) -> List[str]:
+        if found <= self.matched:
+            return []
+        self.matched |= found
+        new_flags = sorted(flag for flag, groups in self.rules.items()
+                           if flag not in self.flagged and groups <= self.matched)
+        self.flagged.update(new_flags)
+        return new_flags
+
+    def _holdback_start(self, buffer: str) -> int:
+        # Walk back over PII characters, and over single spaces between digits
+        # (card numbers are often grouped), but never further than max_holdback
+        limit = max(0, len(buffer) - self.max_holdback)
+        i = len(buffer)
+        while i > limit:
+            ch = buffer[i - 1]
+            if ch in _PII_CHARS:
+                i -= 1
+            elif ch == ' ' and i >= 2 and buffer[i - 2].isdigit() and (i == len(buffer) or buffer[i].isdigit()):
+                i -= 1
+            else:
+                break
+        return i
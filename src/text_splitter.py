@@ -0,0 +1,212 @@
+import os
+import re
+import logging
+from functools import partial
+from itertools import accumulate, chain, islice
+from typing import Iterable, List, NamedTuple, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+# Roughly one WordPiece token per 6 word characters or per punctuation mark; long
+# clinical terms split into several pieces, so they count as several tokens
+TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+# Structural lines, matched over the whole page at once: table rows (two or more
+# aligned column gaps, or a pipe table) and headings (numbered with a section dot,
+# all caps, or every word capitalized and no closing punctuation). Everything
+# between is prose.
+STRUCTURE = re.compile(r"""
+    ^[ \t]*(?:
+        (?P<row>[^\n]*?\S(?:[ ]{2,}|\t)\S[^\n]*?\S(?:[ ]{2,}|\t)\S[^\n]*? | \|[^\n]*\|)
+      | (?P<heading>(?:\d+\.(?:\d+\.?)*|[IVX]+\.)[ \t]+[A-Z][^\n]{0,60}?
+          | (?=[^\n]*[A-Za-z]{3})[^a-z\s\d][^\s]*(?:[ \t]+[^a-z\s][^\s]*){0,9}?
+        )(?<![.,;?!])
+    )[ \t]*$
+""", re.M | re.X)
+# What the line before a heading may end with: a heading never continues a sentence
+HEADING_PRECEDES = frozenset(".!?:")
+# Terminal punctuation, optional closing quotes/brackets, whitespace, then what can
+# start a sentence; or a blank line, which ends a paragraph whatever precedes it
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])|\n[ \t]*\n\s*")
+# Words ending in a period that do not end a sentence
+ABBREVIATIONS = frozenset({"dr", "mr", "mrs", "ms", "prof", "st", "vs", "e.g", "i.e", "etc", "fig", "approx",
+                           "no", "vol", "al", "cf", "ca", "resp"})
+
+PARALLEL_MIN_PAGES = 64  # below this, process start-up costs more than the split
+PAGE_BATCH = 2048  # pages handed to the process pool at a time
+
+
+class ChunkSpan(NamedTuple):
+    """A chunk as a slice of its page: character and UTF-8 byte offsets plus its token estimate"""
+    start: int
+    end: int
+    start_byte: int
+    end_byte: int
+    tokens: int
+
+
+def count_tokens(text: str, start: int = 0, end: int = None) -> int:
+    return len(TOKEN_PATTERN.findall(text, start, len(text) if end is None else end))
+
+
+def _sentences(text: str, start: int, end: int, units: list):
+    """Append (start, end, kind) for each sentence of the prose in text[start:end]"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    last = start
+    for match in SENTENCE_END.finditer(text, start, end):
+        stop = match.start()
+        if text[stop] != "\n":
+            words = text[max(last, stop - 16):stop].split()
+            word = words[-1].lstrip("(\"'").lower() if words else ""
+            if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                continue
+            stop += 1
+        units.append((last, stop, "text"))
+        last = match.end()
+    if last < end:
+        units.append((last, end, "text"))
+
+
+def _starts_block(text: str, line_start: int, structure_end: int) -> bool:
+    """Whether the line at line_start opens a block: it starts the page, follows a
+    blank line, a finished sentence, or another heading or table row"""
+    if line_start == 0 or line_start - 1 == structure_end:
+        return True
+    previous = text[text.rfind("\n", 0, line_start - 1) + 1:line_start - 1].rstrip()
+    return not previous or previous[-1] in HEADING_PRECEDES
+
+
+def _segment(text: str) -> List[Tuple[int, int, str]]:
+    """Headings, table rows and sentences of a page, in order; prose may span wrapped lines"""
+    units = []
+    prose = 0
+    structure_end = -2
+    for match in STRUCTURE.finditer(text):
+        kind = match.lastgroup
+        if kind == "heading" and not _starts_block(text, match.start(), structure_end):
+            # A wrapped prose line that happens to look like a heading ("2019 The ...")
+            continue
+        start, end = match.span(kind)
+        _sentences(text, prose, match.start(), units)
+        units.append((start, end, kind))
+        prose = structure_end = match.end()
+    _sentences(text, prose, len(text), units)
+    return units
+
+
+def _hard_split(text: str, start: int, end: int, max_tokens: int) -> List[Tuple[int, int, int]]:
+    """Cut a unit longer than max_tokens at token boundaries"""
+    pieces = []
+    piece_start, count, previous_end = start, 0, start
+    for token in TOKEN_PATTERN.finditer(text, start, end):
+        if count == max_tokens:
+            pieces.append((piece_start, previous_end, count))
+            piece_start, count = token.start(), 0
+        count += 1
+        previous_end = token.end()
+    pieces.append((piece_start, end, count))
+    return pieces
+
+
+def split_page(text: str, max_tokens: int = 128, overlap_tokens: int = 16) -> List[ChunkSpan]:
+    """
+    Pack a page's sentences into chunks of at most max_tokens. Chunks start at
+    headings, keep a table together when it fits in one chunk, and repeat up
+    to overlap_tokens of trailing sentences when a chunk is cut for size.
+    """
+    units = []
+    for start, end, kind in _segment(text):
+        tokens = count_tokens(text, start, end)
+        if tokens > max_tokens:
+            units.extend((s, e, t, kind) for s, e, t in _hard_split(text, start, end, max_tokens))
+        elif tokens:
+            units.append((start, end, tokens, kind))
+
+    # Prefix sums: tokens of units[a:b] is total[b] - total[a]
+    total = [0, *accumulate(unit[2] for unit in units)]
+    chunks: List[Tuple[int, int]] = []  # unit index ranges
+    first = 0
+    for i, (_, _, tokens, kind) in enumerate(units):
+        used = total[i] - total[first]
+        cut = kind == "heading" or used + tokens > max_tokens
+        starts_table = kind == "row" and (i == 0 or units[i - 1][3] != "row")
+        if starts_table and not cut:
+            # Move a table that fits in one chunk to a fresh chunk rather than splitting it
+            end = i
+            while end < len(units) and units[end][3] == "row":
+                end += 1
+            table = total[end] - total[i]
+            cut = used + table > max_tokens >= table
+        if not cut or i == first:
+            continue
+
+        chunks.append((first, i))
+        first = i
+        if kind != "heading" and not starts_table:
+            # Cut for size: repeat trailing sentences that fit in the overlap budget
+            budget = min(overlap_tokens, max_tokens - tokens)
+            while first - 1 > chunks[-1][0] and units[first - 1][3] != "heading" \
+                    and total[i] - total[first - 1] <= budget:
+                first -= 1
+    if units:
+        chunks.append((first, len(units)))
+
+    ascii_only = text.isascii()
+    spans = []
+    char, byte = 0, 0  # chunk starts only move forward, so byte offsets are counted incrementally
+    for first, last in chunks:
+        start, end = units[first][0], units[last - 1][1]
+        if ascii_only:
+            start_byte, end_byte = start, end
+        else:
+            byte += len(text[char:start].encode("utf-8"))
+            char = start
+            start_byte, end_byte = byte, byte + len(text[start:end].encode("utf-8"))
+        spans.append(ChunkSpan(start, end, start_byte, end_byte, total[last] - total[first]))
+    return spans
+
+
+def _page_chunks(doc: Document, spans: List[ChunkSpan]) -> List[Document]:
+    text = doc.page_content
+    return [Document(page_content=text[span.start:span.end],
+                     metadata={**doc.metadata, "start_byte": span.start_byte, "end_byte": span.end_byte})
+            for span in spans]
+
+
+def split_documents(docs: Iterable[Document], max_tokens: int = 128, overlap_tokens: int = 16,
+                    workers: int = 0) -> List[Document]:
+    """
+    Split pages into chunk Documents carrying start_byte/end_byte offsets into
+    their page. Pages are split in a process pool; workers return only
+    offsets, and the chunk texts are sliced here from the pages already in
+    memory. docs may be a generator: pages are read PAGE_BATCH at a time, so
+    only one batch of pages is held at once. workers=0 uses every CPU, 1
+    splits in-process.
+    """
+    docs = iter(docs)
+    workers = workers or os.cpu_count() or 1
+    split = partial(split_page, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    batch = list(islice(docs, PARALLEL_MIN_PAGES))
+    chunks = []
+    pages = 0
+    if workers == 1 or len(batch) < PARALLEL_MIN_PAGES:
+        workers = 1
+        for doc in chain(batch, docs):
+            chunks.extend(_page_chunks(doc, split(doc.page_content)))
+            pages += 1
+    else:
+        batch.extend(islice(docs, PAGE_BATCH - len(batch)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while batch:
+                spans_per_page = executor.map(split, [doc.page_content for doc in batch],
+                                              chunksize=max(1, len(batch) // (workers * 4)))
+                for doc, spans in zip(batch, spans_per_page):
+                    chunks.extend(_page_chunks(doc, spans))
+                pages += len(batch)
+                batch = list(islice(docs, PAGE_BATCH))
+    logger.info(f"Split {pages} pages into {len(chunks)} chunks with {workers} worker(s)")
+    return chunks
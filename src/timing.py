@@ -0,0 +1,52 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageTimer:
+    """Records per-stage durations and milestones (e.g. first token) for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+        # A profiler turns this on to learn which thread is running which stage
+        self.track_threads = False
+        self._active: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        tracked = self.track_threads
+        if tracked:
+            ident = threading.get_ident()
+            previous = self._active.get(ident)
+            self._active[ident] = name
+        try:
+            yield
+        finally:
+            if tracked:
+                if previous is None:
+                    self._active.pop(ident, None)
+                else:
+                    self._active[ident] = previous
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def active_stages(self) -> Dict[int, str]:
+        """Thread ident to the stage it is currently running (only while track_threads is on)"""
+        return dict(self._active)
+
+    def mark(self, name: str):
+        """Record the time since the timer started, once per name"""
+        with self._lock:
+            self.marks.setdefault(name, (time.perf_counter() - self.started) * 1000)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                "stages_ms": {name: round(ms, 2) for name, ms in self.stages.items()},
+                "marks_ms": {name: round(ms, 2) for name, ms in self.marks.items()},
+            }
@@ -0,0 +1,102 @@
+import os
+import gzip
+import atexit
+import json
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from src.evaluation import percentile
+
+logger = logging.getLogger(__name__)
+
+TRACE_VERSION = 1
+
+
+class TrafficRecorder:
+    """
+    Appends one compact record per request to a gzip JSONL trace: arrival
+    time, the query with PII redacted by the caller, its shape and stage
+    timings. Each worker writes its own file, so no cross-process locking.
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.path = os.path.join(directory, f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.gz")
+        self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.records = 0
+        self._write({"trace_version": TRACE_VERSION, "started": time.time(), "pid": os.getpid()})
+        # Writes the gzip end-of-stream marker on a clean worker exit
+        atexit.register(self.close)
+        logger.info(f"📼 Capturing traffic to {self.path}")
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, arrival: float, query: str, session_hash: str, query_type: str, timings: Dict[str, Any],
+               total_ms: float, prefetched: bool = False, endpoint: str = "/get"):
+        """query must already be redacted"""
+        self._write({
+            "t": round(arrival, 4),
+            "endpoint": endpoint,
+            "session": session_hash,
+            "query": query,
+            "chars": len(query),
+            "query_type": query_type,
+            "prefetched": prefetched,
+            "total_ms": round(total_ms, 2),
+            **timings,
+        })
+        self.records += 1
+
+    def _write(self, record: dict):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self._lock:
+            self._file.write(line)
+            # Sync-flush per record so a killed worker loses at most the line in progress
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def load_trace(paths: Iterable[str]) -> List[dict]:
+    """Requests from one or more trace files, merged in arrival order"""
+    requests = []
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A worker killed mid-write leaves a truncated last line
+                        continue
+                    if "t" in record:
+                        requests.append(record)
+            except (EOFError, gzip.BadGzipFile) as e:
+                # A live or killed worker's trace has no gzip end-of-stream marker;
+                # every record flushed before that point is still usable
+                logger.warning(f"Trace {path} ends early ({e}); keeping {len(requests)} records read so far")
+    requests.sort(key=lambda record: record["t"])
+    return requests
+
+
+def latency_summary(values: List[float]) -> Optional[Dict[str, float]]:
+    """Count, mean and the usual percentiles of a latency sample in milliseconds"""
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 2),
+        **{f"p{q}": round(percentile(values, q), 2) for q in (50, 90, 99)},
+        "max": round(max(values), 2),
+    }
@@ -8,6 +8,8 @@ class MediBotChat {
         this.recognition = null;
         this.conversationHistory = [];
         this.currentMessageId = null;
+        this.prefetchTimer = null;
+        this.lastPrefetched = '';
 
         console.log('MediBotChat initialized with session:', this.sessionId);
         this.init();
@@ -248,6 +250,28 @@ class MediBotChat {
         if (this.elements.sendBtn) {
             this.elements.sendBtn.disabled = length === 0 || length > maxLength;
         }
+
+        this.schedulePrefetch(e.target.value);
+    }
+
+    // Warm retrieval for the draft once the user pauses typing
+    schedulePrefetch(draft) {
+        clearTimeout(this.prefetchTimer);
+        const message = draft.trim();
+        if (message.length < 8 || message.length > 1000 || message === this.lastPrefetched) {
+            return;
+        }
+
+        this.prefetchTimer = setTimeout(() => {
+            this.lastPrefetched = message;
+            fetch('/prefetch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ msg: message, session_id: this.sessionId })
+            }).catch(() => {
+                // Prefetch is best-effort; the real request still works without it
+            });
+        }, 400);
     }
 
     handleKeyDown(e) {
@@ -273,6 +297,7 @@ class MediBotChat {
     // ✅ FIXED: Improved EventSource handling
     async sendMessage(message) {
         console.log('📤 Sending message:', message);
+        clearTimeout(this.prefetchTimer);
 
         const userMessage = {
             type: 'user',
@@ -329,6 +354,9 @@ class MediBotChat {
                     } else if (data.type === 'medical_warning') {
                         this.showMedicalWarning(data.content);
 
+                    } else if (data.type === 'safety_flag') {
+                        this.showMedicalWarning(data.content);
+
                     } else if (data.type === 'error') {
                         connectionClosed = true;
                         this.handleError(data.content);
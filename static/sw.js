@@ -1,51 +1,80 @@
-const CACHE_NAME = 'medibot-ai-v2.0.0';
-const urlsToCache = [
-  '/',
-  '/static/style.css',
-  '/static/enhanced-chat.js',
-  '/static/manifest.json',
-  'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css',
-  'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css',
-  'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap',
-  'https://cdn.jsdelivr.net/npm/marked/marked.min.js',
-  'https://code.jquery.com/jquery-3.7.1.min.js'
-];
+// The page registers /sw.js?v=<asset version>; each build therefore installs a fresh worker and cache
+const ASSET_VERSION = new URL(self.location).searchParams.get('v') || 'dev';
+const CACHE_NAME = `medibot-ai-${ASSET_VERSION}`;
+const ASSET_MANIFEST_URL = '/assets/asset-manifest.json';
+// Unbuilt development checkout: no manifest, plain static files
+const unhashedUrls = ['/static/style.css', '/static/enhanced-chat.js', '/static/manifest.json'];
 
-// Install event - cache resources
+function precacheUrls() {
+  return fetch(ASSET_MANIFEST_URL, { cache: 'no-cache' })
+    .then((response) => (response.ok ? response.json() : null))
+    .then((manifest) => {
+      const assets = manifest
+        ? Object.values(manifest.assets).map((name) => `/assets/${name}`)
+        : unhashedUrls;
+      return ['/', ...assets];
+    })
+    .catch(() => ['/', ...unhashedUrls]);
+}
+
+// Install event - precache the current build's hashed assets (same-origin only)
 self.addEventListener('install', (event) => {
   event.waitUntil(
-    caches.open(CACHE_NAME)
-      .then((cache) => {
+    Promise.all([caches.open(CACHE_NAME), precacheUrls()])
+      .then(([cache, urls]) => {
         console.log('📦 Caching MediBot resources');
-        return cache.addAll(urlsToCache);
+        return cache.addAll(urls);
       })
+      .then(() => self.skipWaiting())
       .catch((error) => {
         console.error('❌ Cache installation failed:', error);
       })
   );
 });
 
-// Fetch event - serve from cache when offline
+function isApiRequest(url) {
+  return ['/get', '/feedback', '/prefetch', '/admin/', '/health'].some((path) => url.pathname.startsWith(path));
+}
+
+// Fetch event - hashed assets never change, so serve them from cache; pages go to the network first
 self.addEventListener('fetch', (event) => {
+  const url = new URL(event.request.url);
+
+  // Cross-origin CDN requests are left to the browser: the worker runs under
+  // connect-src 'self', so fetching them from here would be blocked
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+
+  // API calls always go to the network
+  if (event.request.method !== 'GET' || isApiRequest(url)) {
+    return;
+  }
+
+  if (event.request.mode === 'navigate') {
+    event.respondWith(
+      fetch(event.request)
+        .then((response) => {
+          const copy = response.clone();
+          caches.open(CACHE_NAME).then((cache) => cache.put(event.request, copy));
+          return response;
+        })
+        .catch(() => caches.match(event.request).then((cached) => cached || offlineResponse()))
+    );
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then((response) => {
         // Return cached version or fetch from network
-        if (response) {
-          return response;
-        }
-
-        // For API calls, always try network first
-        if (event.request.url.includes('/get') || event.request.url.includes('/feedback')) {
-          return fetch(event.request);
-        }
-
-        return fetch(event.request);
+        return response || fetch(event.request);
       })
-      .catch(() => {
-        // If both cache and network fail, return offline page for navigation requests
-        if (event.request.mode === 'navigate') {
-          return new Response(`
+  );
+});
+
+function offlineResponse() {
+  return new Response(`
             <!DOCTYPE html>
             <html>
             <head>
@@ -70,12 +99,9 @@ self.addEventListener('fetch', (event) => {
             </body>
             </html>
           `, {
-            headers: { 'Content-Type': 'text/html' }
-          });
-        }
-      })
-  );
-});
+    headers: { 'Content-Type': 'text/html' }
+  });
+}
 
 // Activate event - clean up old caches
 self.addEventListener('activate', (event) => {
@@ -89,7 +115,7 @@ self.addEventListener('activate', (event) => {
           }
         })
       );
-    })
+    }).then(() => self.clients.claim())
   );
 });
 
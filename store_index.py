@@ -3,10 +3,14 @@ from dotenv import load_dotenv
 import os
 import time
 import logging
-from src.helper import load_pdf_file, filter_to_minimal_docs, text_split, download_hugging_face_embeddings
+from src.helper import load_pdf_file, iter_minimal_docs, text_split, download_hugging_face_embeddings
+from src.docstore import write_docstore, ChunkTextStore
+from src.index_generations import new_generation, publish_generation, prune_generations
+from src.quantization import write_vector_index
+from src.embedding_cache import EmbeddingCache, CachedEmbeddings
+from config import Config
 from pinecone import Pinecone
 from pinecone import ServerlessSpec
-from langchain_pinecone import PineconeVectorStore
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -54,22 +58,14 @@ def main():
 
         logger.info(f"Found {len(pdf_files)} PDF file(s): {pdf_files}")
 
-        # Step 2: Process PDF documents
+        # Steps 2-4: Load, filter and split the PDF pages. Pages are streamed from the
+        # parse cache straight into the splitter, so only the chunks stay in memory.
         print("\n📚 STEP 1: Loading PDF Documents...")
-        extracted_data = load_pdf_file(data=data_dir)
+        extracted_data = load_pdf_file(data=data_dir, lazy=True)
 
-        if not extracted_data:
-            logger.error("No documents were extracted from PDFs")
-            return
-
-        print(f"✓ Loaded {len(extracted_data)} document pages")
-
-        # Step 3: Filter documents
         print("\n🔧 STEP 2: Filtering Documents...")
-        filter_data = filter_to_minimal_docs(extracted_data)
-        print(f"✓ Filtered {len(filter_data)} documents")
+        filter_data = iter_minimal_docs(extracted_data)
 
-        # Step 4: Split into chunks
         print("\n✂️ STEP 3: Splitting Text into Chunks...")
         text_chunks = text_split(filter_data)
 
@@ -77,7 +73,8 @@ def main():
             logger.error("No text chunks were created")
             return
 
-        print(f"✓ Created {len(text_chunks)} text chunks")
+        page_count = len({(chunk.metadata.get("source"), chunk.metadata.get("page")) for chunk in text_chunks})
+        print(f"✓ Created {len(text_chunks)} text chunks from {page_count} document pages")
 
         # Step 5: Initialize embeddings
         print("\n🤖 STEP 4: Initializing Embeddings...")
@@ -112,19 +109,48 @@ def main():
         else:
             print(f"✓ Using existing index: {index_name}")
 
-        # Step 7: Create vector store
-        print("\n💾 STEP 6: Creating Vector Store...")
+        index = pc.Index(index_name)
+
+        # Step 7: Write local docstore and upload vectors
+        print("\n💾 STEP 6: Writing Docstore and Uploading Vectors...")
         print("⏳ This may take a few minutes depending on document size...")
 
-        docsearch = PineconeVectorStore.from_documents(
-            documents=text_chunks,
-            index_name=index_name,
-            embedding=embeddings,
-        )
+        # Each build is a new generation; running workers keep serving the previous one until it is published
+        generation, docstore_dir = new_generation(Config.LOCAL_INDEX_DIR)
+        write_docstore(docstore_dir, text_chunks)
+        print(f"✓ Chunk text written to {docstore_dir}/")
+
+        # Unchanged chunk texts are served from the embedding cache; only new ones hit the model
+        cached_embeddings = CachedEmbeddings(embeddings, EmbeddingCache(Config.EMBEDDING_CACHE_DIR, 384))
+        all_vectors = cached_embeddings.embed_documents_array([chunk.page_content for chunk in text_chunks])
+        print(f"✓ Embeddings: {cached_embeddings.hits} cached, {cached_embeddings.misses} computed")
+
+        # Chunk text stays local; the index only holds vectors and the source name.
+        # Vector ids are docstore rows, so each generation gets its own namespace.
+        batch_size = 100
+        for start in range(0, len(text_chunks), batch_size):
+            batch = text_chunks[start:start + batch_size]
+            index.upsert(vectors=[
+                (str(start + i), all_vectors[start + i].tolist(),
+                 {"source": chunk.metadata.get("source") or "Unknown Source"})
+                for i, chunk in enumerate(batch)
+            ], namespace=generation)
+
+        # Local quantized copy for the 'local' vector backend
+        info = write_vector_index(docstore_dir, all_vectors, Config.EMBEDDING_QUANTIZATION, Config.PQ_SUBSPACES)
+        print(f"✓ Local {info['quantization']} vector index written ({info['code_bytes'] / 1e6:.1f} MB)")
+
+        # Switch running workers over, then drop generations no worker can still be serving
+        publish_generation(Config.LOCAL_INDEX_DIR, generation)
+        for name in prune_generations(Config.LOCAL_INDEX_DIR):
+            try:
+                index.delete(delete_all=True, namespace=name)
+            except Exception as e:
+                logger.warning(f"Could not delete vectors of generation {name}: {e}")
+        print(f"✓ Published index generation {generation}")
 
         # Step 8: Verify the upload
         print("\n✅ STEP 7: Verifying Upload...")
-        index = pc.Index(index_name)
         stats = index.describe_index_stats()
 
         print(f"✓ Vector store created successfully!")
@@ -134,7 +160,10 @@ def main():
         # Test query
         print("\n🔍 STEP 8: Testing Query...")
         test_query = "What is diabetes?"
-        test_results = docsearch.similarity_search(test_query, k=3)
+        docstore = ChunkTextStore(docstore_dir)
+        response = index.query(vector=embeddings.embed_query(test_query), top_k=3, namespace=generation)
+        test_results = [docstore.get_text(match['id']) for match in response['matches']]
+        docstore.close()
 
         print(f"✓ Test query successful!")
         print(f"✓ Found {len(test_results)} relevant documents")
@@ -144,7 +173,7 @@ def main():
         print("=" * 60)
         print(f"📊 Summary:")
         print(f"   • PDF files processed: {len(pdf_files)}")
-        print(f"   • Document pages: {len(extracted_data)}")
+        print(f"   • Document pages: {page_count}")
         print(f"   • Text chunks: {len(text_chunks)}")
         print(f"   • Vectors in database: {stats['total_vector_count']}")
         print(f"   • Index name: {index_name}")